@@ -1,25 +1,38 @@
 import discord
 from discord.ui import View, Button
 from discord import app_commands
+from discord.ext import tasks
 from discord import errors as discord_errors
 import asyncio
+import aiohttp
+from aiohttp import web
 import json
-import requests
+from array import array
+from collections import OrderedDict, deque
+from contextlib import aclosing, contextmanager
 import time
 import random
 from datetime import datetime
 from discord import errors as discord_errors
 import concurrent.futures
+import contextvars
+import hashlib
+import heapq
 import logging
+import sys
+import sqlite3
+import threading
+import weakref
 
 logger = logging.getLogger(__name__)
 
 # Custom View for Highscores dropdown menu
+# Every component has a stable custom_id, so the bot keeps handling clicks on messages sent before a restart.
+# Build these through HighscoresBot.highscores_view, which keeps one instance per (category, loading) state.
 class HighscoresView(View):
-    def __init__(self, bot, cached_embeds=None, active_category="skills", is_loading=False):
+    def __init__(self, bot, active_category="skills", is_loading=False):
         super().__init__(timeout=None)  # No timeout for the view
         self.bot = bot
-        self.cached_embeds = cached_embeds or {}
         self.active_category = active_category
         self.is_loading = is_loading
 
@@ -45,171 +58,20 @@ class HighscoresView(View):
 
         # Add the appropriate dropdown based on active category
         if active_category == "skills":
-            self.add_item(SkillsDropdown(self.bot, self.cached_embeds, is_loading))
+            self.add_item(SkillsDropdown(self.bot, is_loading))
         else:
-            self.add_item(BossesDropdown(self.bot, self.cached_embeds, is_loading))
+            self.add_item(BossesDropdown(self.bot, is_loading))
 
     async def skills_button_callback(self, interaction):
-        try:
-            # Acknowledge the interaction IMMEDIATELY with a very fast response
-            # This is critical to prevent the "application did not respond" error
-            await interaction.response.defer(ephemeral=True)
-
-            try:
-                # Create a new view with skills as active category and loading state enabled
-                loading_view = HighscoresView(self.bot, self.cached_embeds, active_category="skills", is_loading=True)
-
-                # Update the message to show loading state
-                await interaction.message.edit(view=loading_view)
-            except Exception as e:
-                print(f"Error setting loading state: {str(e)}")
-
-            # Always use cached embed if available, otherwise create a new one
-            try:
-                if "total" in self.cached_embeds:
-                    embed = self.cached_embeds["total"]
-                    # Update the timestamp to show it's current
-                    embed.timestamp = datetime.now()
-                else:
-                    embed = await self.bot.update_highscores(view_type="total")
-                    if isinstance(embed, discord.Embed):
-                        embed.timestamp = datetime.now()
-                        self.cached_embeds["total"] = embed
-                        # Store cache time for this embed
-                        if not hasattr(self.bot, 'cache_times'):
-                            self.bot.cache_times = {}
-                        self.bot.cache_times["total"] = time.time()
-            except Exception as e:
-                print(f"Error getting embed: {str(e)}")
-                await interaction.edit_original_response(content="❌ Error fetching data. Please try again.")
-                return
-
-            # Create a new view with loading state disabled
-            new_view = HighscoresView(self.bot, self.cached_embeds, active_category="skills", is_loading=False)
-
-            success = False
-            try:
-                await interaction.message.edit(embed=embed, view=new_view)
-                success = True
-            except discord.errors.HTTPException as e:
-                print(f"Error editing message in skills button: {str(e)}")
-                try:
-                    new_message = await interaction.message.channel.send(embed=embed, view=new_view)
-                    self.bot.last_message = new_message
-                    success = True
-                except Exception as e2:
-                    print(f"Error sending new message: {str(e2)}")
-
-            if success:
-                await interaction.edit_original_response(content="✅ Switched to Skills category")
-            else:
-                await interaction.edit_original_response(content="❌ Failed to update or create Skills embed")
-        except Exception as e:
-            print(f"Error in skills_button_callback: {str(e)}")
-            try:
-                # If the interaction hasn't been responded to yet
-                if not interaction.response.is_done():
-                    await interaction.response.send_message("❌ An error occurred while processing your request", ephemeral=True)
-                else:
-                    await interaction.edit_original_response(content="❌ An error occurred while processing your request")
-            except:
-                print("Could not update error message")
+        await self.bot.show_highscores(interaction, "skills", "total", "Skills")
 
     async def bosses_button_callback(self, interaction):
-        try:
-            # Acknowledge the interaction IMMEDIATELY with a very fast response
-            # This is critical to prevent the "application did not respond" error
-            await interaction.response.defer(ephemeral=True)
-
-            # Check if we already have the bosses overview embed cached
-            bosses_overview_key = "bosses_overview"
-            using_cached = bosses_overview_key in self.cached_embeds
-
-            try:
-                # Create a new view with bosses as active category but in loading state
-                loading_view = HighscoresView(self.bot, self.cached_embeds, active_category="bosses", is_loading=True)
-
-                # Update the message to show loading state
-                await interaction.message.edit(view=loading_view)
-            except Exception as view_error:
-                print(f"Error creating bosses loading view: {str(view_error)}")
-                await interaction.followup.send(content=f"❌ Error creating bosses view: {str(view_error)}", ephemeral=True)
-                return
-
-            # Get a generic bosses overview embed or create one
-            try:
-                if using_cached:
-                    embed = self.cached_embeds[bosses_overview_key]
-                    # Update the timestamp to show it's current
-                    embed.timestamp = datetime.now()
-                    print("Using cached bosses overview data")
-                else:
-                    print("Need to create new bosses overview embed")
-                    embed = await self.bot.create_bosses_overview_embed()
-                    if isinstance(embed, discord.Embed):
-                        embed.timestamp = datetime.now()
-                        self.cached_embeds[bosses_overview_key] = embed
-                        # Store cache time for this embed
-                        if not hasattr(self.bot, 'cache_times'):
-                            self.bot.cache_times = {}
-                        self.bot.cache_times[bosses_overview_key] = time.time()
-            except Exception as embed_error:
-                print(f"Error creating bosses overview embed: {str(embed_error)}")
-                await interaction.edit_original_response(content=f"❌ Error creating bosses overview: {str(embed_error)}")
-                return
-
-            # Create the final view with loading state disabled
-            new_view = HighscoresView(self.bot, self.cached_embeds, active_category="bosses", is_loading=False)
-
-            success = False
-            error_message = None
-
-            try:
-                await interaction.message.edit(embed=embed, view=new_view)
-                success = True
-            except discord.errors.HTTPException as e:
-                error_message = str(e)
-                print(f"Error editing message in bosses button: {error_message}")
-                # Try to send a new message instead
-                try:
-                    new_message = await interaction.message.channel.send(embed=embed, view=new_view)
-                    self.bot.last_message = new_message
-                    success = True
-                except Exception as e2:
-                    error_message = str(e2)
-                    print(f"Error sending new message: {error_message}")
-
-            if success:
-                if using_cached:
-                    # Get cache age
-                    cache_age = 0
-                    if hasattr(self.bot, 'cache_times') and bosses_overview_key in self.bot.cache_times:
-                        cache_age = time.time() - self.bot.cache_times[bosses_overview_key]
-                        time_ago = f"{int(cache_age/60)} minutes" if cache_age < 3600 else f"{int(cache_age/3600)} hours"
-                        await interaction.edit_original_response(content=f"✅ Switched to Bosses category (cached from {time_ago} ago)")
-                    else:
-                        await interaction.edit_original_response(content=f"✅ Switched to Bosses category")
-                else:
-                    await interaction.edit_original_response(content="✅ Switched to Bosses category (freshly loaded)")
-            else:
-                await interaction.edit_original_response(content=f"❌ Failed to update or create Bosses embed: {error_message}")
-        except Exception as e:
-            error_msg = str(e)
-            print(f"Error in bosses_button_callback: {error_msg}")
-            try:
-                # If the interaction hasn't been responded to yet
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(f"❌ An error occurred: {error_msg}", ephemeral=True)
-                else:
-                    await interaction.edit_original_response(content=f"❌ An error occurred: {error_msg}")
-            except:
-                print("Could not update error message")
+        await self.bot.show_highscores(interaction, "bosses", "bosses_overview", "Bosses")
 
 # Dropdown menu for highscores selection
 class SkillsDropdown(discord.ui.Select):
-    def __init__(self, bot, cached_embeds=None, is_loading=False):
+    def __init__(self, bot, is_loading=False):
         self.bot = bot
-        self.cached_embeds = cached_embeds or {}
 
         # Define all skill options
         options = [
@@ -239,6 +101,7 @@ class SkillsDropdown(discord.ui.Select):
         placeholder = "Loading skills..." if is_loading else "Select a skill category..."
 
         super().__init__(
+            custom_id="skills_dropdown",
             placeholder=placeholder, 
             min_values=1, 
             max_values=1, 
@@ -247,103 +110,9 @@ class SkillsDropdown(discord.ui.Select):
         )
 
     async def callback(self, interaction):
-        try:
-            selected_value = self.values[0]
-            current_time = time.time()
-
-            # Acknowledge the interaction IMMEDIATELY with a very fast response
-            # This is critical to prevent the "application did not respond" error
-            await interaction.response.defer(thinking=False, ephemeral=True)
-
-            # Now that we've acknowledged, we can take time to update the message
-            try:
-                # Set the loading state on the UI
-                loading_view = HighscoresView(self.bot, self.cached_embeds, active_category="skills", is_loading=True)
-                await interaction.message.edit(view=loading_view)
-            except Exception as e:
-                print(f"Error setting loading state: {str(e)}")
-
-            # Check if we have a cached embed
-            cached_entry = self.cached_embeds.get(selected_value, None)
-            cache_age = 0
-
-            if not hasattr(self.bot, 'cache_times'):
-                self.bot.cache_times = {}
-
-            if cached_entry and selected_value in self.bot.cache_times:
-                cache_age = current_time - self.bot.cache_times[selected_value]
-
-            try:
-                if cached_entry:
-                    embed = cached_entry
-                    # Update the timestamp
-                    embed.timestamp = datetime.now()
-                    print(f"Using cached embed for {selected_value}")
-                elif selected_value == "total":
-                    embed = await self.bot.update_highscores(view_type="total")
-                    if isinstance(embed, discord.Embed):
-                        # Set a proper discord.py timestamp
-                        embed.timestamp = datetime.now()
-                        self.cached_embeds["total"] = embed
-                        self.bot.cache_times["total"] = time.time()
-                else:
-                    # For specific skill
-                    embed = await self.bot.create_single_category_embed(selected_value)
-                    if isinstance(embed, discord.Embed):
-                        # Set a proper discord.py timestamp
-                        embed.timestamp = datetime.now()
-                        self.cached_embeds[selected_value] = embed
-                        self.bot.cache_times[selected_value] = time.time()
-            except Exception as e:
-                print(f"Error getting embed for {selected_value}: {str(e)}")
-                await interaction.edit_original_response(content=f"❌ Error loading {selected_value} data: {str(e)}")
-
-                # Reset the view to non-loading state even when there's an error
-                try:
-                    reset_view = HighscoresView(self.bot, self.cached_embeds, active_category="skills", is_loading=False)
-                    await interaction.message.edit(view=reset_view)
-                except:
-                    pass
-                return
-
-            # Create a new HighscoresView with cached embeds to replace the existing view (without loading state)
-            new_view = HighscoresView(self.bot, self.cached_embeds, active_category="skills", is_loading=False)
-
-            edited = False
-            try:
-                await interaction.message.edit(embed=embed, view=new_view)
-                edited = True
-            except discord.errors.HTTPException as e:
-                print(f"Error editing message: {str(e)}")
-                # If edit fails, try to send a new message
-                try:
-                    new_message = await interaction.message.channel.send(embed=embed, view=new_view)
-                    self.bot.last_message = new_message
-                    edited = True
-                except Exception as e2:
-                    print(f"Error sending new message: {str(e2)}")
-
-            # Only send followup if we successfully edited the message
-            if edited:
-                # Update the "please wait" message instead of sending a new one
-                category_name = next((option.label for option in self.options if option.value == selected_value), selected_value)
-                # Provide minimal confirmation without redundant details
-                await interaction.edit_original_response(content=f"✅ {category_name} highscores loaded")
-            else:
-                await interaction.edit_original_response(content="❌ Failed to update the highscores display")
-
-        except discord_errors.NotFound:
-            print(f"Interaction expired for {self.values[0] if hasattr(self, 'values') and self.values else 'unknown'}")
-        except Exception as e:
-            print(f"Error in skills dropdown callback: {str(e)}")
-            try:
-                # If the interaction hasn't been responded to yet
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
-                else:
-                    await interaction.edit_original_response(content=f"❌ An error occurred: {str(e)}")
-            except:
-                print("Could not update error message")
+        selected_value = self.values[0]
+        category_name = next((option.label for option in self.options if option.value == selected_value), selected_value)
+        await self.bot.show_highscores(interaction, "skills", selected_value, category_name)
 
     # Default timeout for API requests (in seconds)
     API_TIMEOUT = 15
@@ -366,9 +135,8 @@ class SkillsDropdown(discord.ui.Select):
                 print(f"Could not send error followup")
 
 class BossesDropdown(discord.ui.Select):
-    def __init__(self, bot, cached_embeds=None, is_loading=False):
+    def __init__(self, bot, is_loading=False):
         self.bot = bot
-        self.cached_embeds = cached_embeds or {}
 
         # Define boss options - 25 maximum allowed by Discord, using 24 here
         options = [
@@ -410,6 +178,7 @@ class BossesDropdown(discord.ui.Select):
         placeholder = "Loading bosses..." if is_loading else "Select a boss category..."
 
         super().__init__(
+            custom_id="bosses_dropdown",
             placeholder=placeholder, 
             min_values=1, 
             max_values=1, 
@@ -418,140 +187,1082 @@ class BossesDropdown(discord.ui.Select):
         )
 
     async def callback(self, interaction):
-        try:
-            selected_value = self.values[0]
-            current_time = time.time()
+        selected_value = self.values[0]
+        category_name = next((option.label for option in self.options if option.value == selected_value), selected_value)
+        await self.bot.show_highscores(interaction, "bosses", selected_value, category_name)
 
-            # Acknowledge the interaction IMMEDIATELY with a very fast response
-            # This is critical to prevent the "application did not respond" error
-            await interaction.response.defer(thinking=False, ephemeral=True)
-
-            # Now that we've acknowledged, we can take time to update the message
+# Discord bot token
+import os
+TOKEN = os.environ.get('DISCORD_BOT_TOKEN', '')  # Get token from Replit secrets
+# Where WOM responses are persisted between restarts (set to an empty string to disable)
+WOM_CACHE_PATH = os.environ.get('WOM_CACHE_PATH', 'wom_cache.sqlite3')
+# Seconds between background prewarm passes over every leaderboard embed (0 disables prewarming)
+PREWARM_INTERVAL = int(os.environ.get('PREWARM_INTERVAL', '1800'))
+# Seconds between checks of every posted highscores message for changed data (0 disables auto-refresh)
+AUTO_REFRESH_INTERVAL = int(os.environ.get('AUTO_REFRESH_INTERVAL', '600'))
+# Port of the HTTP server for /metrics and health checks (Cloud Run sets PORT; 0 disables the server)
+METRICS_PORT = int(os.environ.get('PORT', '8080'))
+# WOM group tracked by servers that haven't picked one with !setgroup (OSRS Defence clan)
+DEFAULT_GROUP_ID = int(os.environ.get('WOM_GROUP_ID', '2763'))
+
+# Rough in-memory size of a JSON-like value, used for cache byte budgets
+def approximate_size(value):
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+# Bounded in-memory cache with TTL expiry, LRU eviction and per-namespace stats
+class TTLCache:
+    """Mapping-like cache bounded by entry count and approximate bytes.
+
+    Entries are fresh until their TTL runs out, then kept for stale_ttl more seconds as a
+    fallback before being purged. `get` only returns fresh entries unless allow_stale is set;
+    `in` and `[]` see every entry that hasn't been purged yet.
+    """
+    def __init__(self, name, max_entries=1000, max_bytes=None, default_ttl=None, stale_ttl=0,
+                 sizeof=approximate_size, namespace=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.sizeof = sizeof
+        # Maps a key to its stats namespace, e.g. "player_details_x" -> "player_details"
+        self.namespace = namespace or (lambda key: name)
+        self.entries = OrderedDict()  # key -> [value, stored_at, expires_at, size], oldest use first
+        self.expiry_heap = []  # (purge_at, key) for proactive expiry
+        self.total_bytes = 0
+        self.namespace_stats = {}
+        TTL_CACHES.add(self)
+
+    # The expiry heap is rebuilt once it holds this many records per live entry (plus a small floor),
+    # so records left behind by overwritten and evicted keys don't pile up
+    HEAP_SLACK = 2
+    HEAP_MIN = 64
+
+    def _stats(self, key):
+        namespace = self.namespace(key)
+        stats = self.namespace_stats.get(namespace)
+        if stats is None:
+            stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'entries': 0, 'bytes': 0}
+            self.namespace_stats[namespace] = stats
+        return stats
+
+    def _purge_at(self, entry):
+        return None if entry[2] is None else entry[2] + self.stale_ttl
+
+    def _remove(self, key, reason=None):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry[3]
+        stats = self._stats(key)
+        stats['entries'] -= 1
+        stats['bytes'] -= entry[3]
+        if reason:
+            stats[reason] += 1
+        return entry
+
+    def purge_expired(self, now=None):
+        """Drop every entry whose stale window has passed"""
+        now = now or time.time()
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            purge_at, key = heapq.heappop(self.expiry_heap)
+            entry = self.entries.get(key)
+            # Skip heap records left behind by entries that were overwritten since
+            if entry is not None and self._purge_at(entry) == purge_at:
+                self._remove(key, 'expirations')
+
+    def _compact_heap(self):
+        """Rebuild the expiry heap from the live entries, dropping records of overwritten or removed keys"""
+        self.expiry_heap = [
+            (purge_at, key) for key, purge_at in
+            ((key, self._purge_at(entry)) for key, entry in self.entries.items()) if purge_at is not None
+        ]
+        heapq.heapify(self.expiry_heap)
+
+    def _enforce_limits(self):
+        while self.entries and (len(self.entries) > self.max_entries or
+                                (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            oldest_key = next(iter(self.entries))
+            self._remove(oldest_key, 'evictions')
+
+    def set(self, key, value, ttl=None, expires_at=None, stored_at=None):
+        now = time.time()
+        self.purge_expired(now)
+        if key in self.entries:
+            self._remove(key)
+
+        if expires_at is None:
+            ttl = self.default_ttl if ttl is None else ttl
+            expires_at = None if ttl is None else now + ttl
+        size = self.sizeof(value)
+        entry = [value, stored_at or now, expires_at, size]
+        self.entries[key] = entry
+        self.total_bytes += size
+        stats = self._stats(key)
+        stats['entries'] += 1
+        stats['bytes'] += size
+
+        purge_at = self._purge_at(entry)
+        if purge_at is not None:
+            heapq.heappush(self.expiry_heap, (purge_at, key))
+        self._enforce_limits()
+        if len(self.expiry_heap) > self.HEAP_SLACK * len(self.entries) + self.HEAP_MIN:
+            self._compact_heap()
+
+    def get(self, key, default=None, allow_stale=False):
+        now = time.time()
+        self.purge_expired(now)
+        entry = self.entries.get(key)
+        stats = self._stats(key)
+        if entry is None:
+            stats['misses'] += 1
+            return default
+        if entry[2] is not None and now >= entry[2]:
+            if not allow_stale:
+                stats['misses'] += 1
+                return default
+            stats['stale_hits'] += 1
+        else:
+            stats['hits'] += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def peek(self, key, default=None):
+        """The stored value, fresh or stale, without counting as a lookup"""
+        self.purge_expired()
+        entry = self.entries.get(key)
+        return entry[0] if entry is not None else default
+
+    def stored_at(self, key):
+        entry = self.entries.get(key)
+        return entry[1] if entry else None
+
+    def expires_at(self, key):
+        entry = self.entries.get(key)
+        return entry[2] if entry else None
+
+    def pop(self, key, default=None):
+        if key not in self.entries:
+            return default
+        return self._remove(key)[0]
+
+    def clear(self):
+        for key in list(self.entries):
+            self._remove(key)
+        self.expiry_heap.clear()
+
+    def stats(self):
+        return {namespace: dict(stats) for namespace, stats in self.namespace_stats.items()}
+
+    def __contains__(self, key):
+        self.purge_expired()
+        return key in self.entries
+
+    def __getitem__(self, key):
+        value = self.get(key, self, allow_stale=True)
+        if value is self:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if key not in self.entries:
+            raise KeyError(key)
+        self._remove(key)
+
+    def __len__(self):
+        self.purge_expired()
+        return len(self.entries)
+
+    def keys(self):
+        self.purge_expired()
+        return list(self.entries.keys())
+
+    def items(self):
+        """(key, value) pairs of the fresh entries, without counting as lookups"""
+        now = time.time()
+        return [(key, entry[0]) for key, entry in self.entries.items() if entry[2] is None or now < entry[2]]
+
+# Metrics: counters and histograms served in the Prometheus text format
+def _format_labels(names, values):
+    if not names:
+        return ''
+    # Label values escape backslashes, quotes and newlines
+    escaped = [str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values = {}  # label values -> count
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value, *label_values):
+        series = self.values.get(label_values)
+        if series is None:
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self.values[label_values] = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        else:
+            series[0][-1] += 1
+        series[1] += value
+        series[2] += 1
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels + ('le',), label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Every metric the bot exports, plus collectors that read existing stats at scrape time"""
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []  # (name, type, help, callable returning [(labels dict, value)])
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=Histogram.DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, name, metric_type, help_text, collect):
+        self.collectors.append((name, metric_type, help_text, collect))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        for name, metric_type, help_text, collect in self.collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
             try:
-                # Set the loading state on the UI
-                loading_view = HighscoresView(self.bot, self.cached_embeds, active_category="bosses", is_loading=True)
-                await interaction.message.edit(view=loading_view)
+                samples = collect()
             except Exception as e:
-                print(f"Error setting loading state: {str(e)}")
+                print(f"Error collecting {name}: {str(e)}")
+                continue
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}")
+        return '\n'.join(lines) + '\n'
+
+METRICS = MetricsRegistry()
+WOM_REQUEST_SECONDS = METRICS.histogram(
+    "wom_request_duration_seconds", "WOM API request latency", ("endpoint", "status"))
+WOM_RATE_LIMITED = METRICS.counter(
+    "wom_rate_limited_total", "WOM API responses with status 429", ("endpoint",))
+WOM_RETRIES = METRICS.counter(
+    "wom_retries_total", "WOM API requests retried", ("endpoint", "reason"))
+EMBED_BUILD_SECONDS = METRICS.histogram(
+    "embed_build_duration_seconds", "Time to build a leaderboard view", ("group", "view_type", "result"))
+INTERACTION_ACK_SECONDS = METRICS.histogram(
+    "interaction_ack_seconds", "Time from a click to its acknowledgement", ("path",))
+
+# Every live TTLCache, so cache stats can be exported without counting twice
+TTL_CACHES = weakref.WeakSet()
+
+def _cache_lookup_samples():
+    samples = []
+    for cache in list(TTL_CACHES):
+        for namespace, stats in cache.stats().items():
+            for result, key in (('hit', 'hits'), ('stale_hit', 'stale_hits'), ('miss', 'misses')):
+                samples.append(({'cache': cache.name, 'namespace': namespace, 'result': result}, stats[key]))
+    return samples
+
+def _cache_entry_samples():
+    samples = []
+    for cache in list(TTL_CACHES):
+        for namespace, stats in cache.stats().items():
+            samples.append(({'cache': cache.name, 'namespace': namespace}, stats['entries']))
+    return samples
+
+METRICS.collector("cache_lookups_total", "counter", "Cache lookups by namespace and result", _cache_lookup_samples)
+METRICS.collector("cache_entries", "gauge", "Entries held per cache namespace", _cache_entry_samples)
+
+# Tracing: where the wall time of each build went, by stage
+# Most specific first: time covered by several stages' spans counts towards the first of them
+TRACE_STAGES = ("fetch", "validate", "rank", "render", "publish")
+# Finished traces kept for /profile, oldest dropped first
+TRACE_BUFFER_SIZE = 200
+
+class Trace:
+    """Spans of one traced operation (e.g. a click that needed a build), including the tasks it started"""
+    __slots__ = ('name', 'outcome', 'finished_at', 'started', 'ended', 'spans')
+
+    def __init__(self, name):
+        self.name = name
+        self.outcome = "ok"
+        self.finished_at = None
+        self.started = time.perf_counter()
+        self.ended = None
+        self.spans = []  # (stage, start, end)
+
+    @property
+    def duration(self):
+        return (self.ended if self.ended is not None else time.perf_counter()) - self.started
+
+    def add(self, stage, start, end):
+        # Spans of tasks that outlive the operation aren't part of it
+        if self.ended is None:
+            self.spans.append((stage, start, end))
+
+    def finish(self):
+        self.ended = time.perf_counter()
+        self.finished_at = time.time()
+        TRACES.append(self)
+
+    def breakdown(self):
+        """Seconds of wall time per stage (plus 'other'), summing to the trace's duration.
+
+        Stages overlap (a ranking validates players, which fetches snapshots) and run concurrently,
+        so each moment is attributed to the most specific stage active at that moment.
+        """
+        events = []
+        for stage, start, end in self.spans:
+            events.append((max(start, self.started), 1, stage))
+            events.append((min(end, self.ended), -1, stage))
+        events.sort(key=lambda event: (event[0], event[1]))
+        totals = dict.fromkeys(TRACE_STAGES + ("other",), 0.0)
+        active = dict.fromkeys(TRACE_STAGES, 0)
+        previous = self.started
+        for at, change, stage in events + [(self.ended, 0, None)]:
+            if at > previous:
+                current = next((name for name in TRACE_STAGES if active[name]), "other")
+                totals[current] += at - previous
+                previous = at
+            if stage is not None:
+                active[stage] += change
+        return totals
+
+TRACES = deque(maxlen=TRACE_BUFFER_SIZE)
+# Trace the current task records into; tasks inherit it from whoever created them
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+@contextmanager
+def traced(name):
+    """Trace everything run in this context, and in tasks it starts, as one operation"""
+    trace = Trace(name)
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    except BaseException:
+        trace.outcome = "error"
+        raise
+    finally:
+        current_trace.reset(token)
+        trace.finish()
+
+@contextmanager
+def trace_span(stage):
+    """Record the enclosed code as a stage of the current trace (no-op outside one)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(stage, start, time.perf_counter())
+
+def slowest_traces(limit=5):
+    return sorted(TRACES, key=lambda trace: trace.duration, reverse=True)[:limit]
+
+# Maximum age in seconds of cached WOM data the current task accepts (None = any fresh entry)
+wom_max_age = contextvars.ContextVar('wom_max_age', default=None)
+
+# Request classes for the WOM scheduler, most urgent first
+PRIORITY_INTERACTIVE = 0  # A user is waiting on the result (dropdown clicks, commands)
+PRIORITY_PREFETCH = 1  # Read-ahead and stale-while-revalidate rebuilds
+PRIORITY_BULK = 2  # Prewarm passes, full cache refreshes and index rebuilds
+# Class of the WOM requests the current task sends, and who they're sent for (shared fairly within a class)
+wom_priority = contextvars.ContextVar('wom_priority', default=PRIORITY_INTERACTIVE)
+wom_request_owner = contextvars.ContextVar('wom_request_owner', default=None)
+
+async def run_with_priority(priority, func, *args, **kwargs):
+    """Call and await a coroutine function with its WOM requests sent at a given priority (only within the current task).
+
+    The coroutine is only created once this runs, so cancelling a task that never started leaves nothing unawaited.
+    """
+    wom_priority.set(priority)
+    return await func(*args, **kwargs)
+
+# Client-wide token bucket that adapts to the WOM API's rate limit headers
+class AdaptiveRateLimiter:
+    """Token bucket whose size and refill rate follow the API's RateLimit-* and Retry-After headers"""
+    def __init__(self, limit=20, window=60.0):
+        self.limit = limit  # Requests allowed per window (the WOM default without an API key)
+        self.window = window  # Window length in seconds, widened to the largest reset seen
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0  # Nobody sends before this (set by Retry-After or an exhausted window)
+
+    @property
+    def rate(self):
+        return self.limit / self.window
+
+    def _refill(self, now):
+        self.tokens = min(float(self.limit), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self, tokens=1):
+        """Seconds until the given number of tokens are available (0 if they are now)"""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        tokens = min(tokens, self.limit)
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def take(self):
+        """Spend a token on a request"""
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def block(self, seconds):
+        """Stop all requests for the given number of seconds"""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self.updated_at = now
+
+    @staticmethod
+    def _header_number(headers, *names):
+        for name in names:
+            value = headers.get(name)
+            if value is not None:
+                try:
+                    return float(value)
+                except ValueError:
+                    pass
+        return None
 
-            # Check if we have a cached embed and if it's still valid (less than 24 hours old)
-            cached_entry = self.cached_embeds.get(selected_value, None)
-            cache_age = 0
+    def update(self, headers, status_code):
+        """Sync the bucket with the server's view of our rate limit; returns a Retry-After wait if any"""
+        limit = self._header_number(headers, 'RateLimit-Limit', 'X-RateLimit-Limit')
+        remaining = self._header_number(headers, 'RateLimit-Remaining', 'X-RateLimit-Remaining')
+        reset = self._header_number(headers, 'RateLimit-Reset', 'X-RateLimit-Reset')
+        # Some APIs send reset as an epoch timestamp rather than seconds remaining
+        if reset is not None and reset > 10 ** 9:
+            reset = max(0.0, reset - time.time())
+
+        now = time.monotonic()
+        self._refill(now)
+        if limit:
+            self.limit = int(limit)
+        if reset is not None and reset > self.window:
+            self.window = reset
+        if remaining is not None:
+            # The server's count is authoritative
+            self.tokens = min(self.tokens, remaining)
+            if remaining < 1 and reset:
+                self.block(reset)
+
+        retry_after = self._header_number(headers, 'Retry-After')
+        if status_code == 429 and retry_after is not None:
+            self.block(retry_after)
+        return retry_after
+
+# Hands out rate limiter tokens by priority class, round-robin between owners within a class
+class RequestScheduler:
+    """Priority queue in front of the rate limiter: interactive requests jump the queue, background ones yield"""
+    BACKGROUND_RESERVE = 2  # Tokens background classes leave in the bucket so a click never waits for a refill
+
+    def __init__(self, rate_limiter):
+        self.rate_limiter = rate_limiter
+        # One queue per class: owner -> deque of waiting entries, rotated for round-robin
+        self.queues = [OrderedDict() for _ in (PRIORITY_INTERACTIVE, PRIORITY_PREFETCH, PRIORITY_BULK)]
+        self.waiting = {}  # Cache key -> queued entry, so callers joining a fetch can raise its priority
+        self.boosts = {}  # Owner -> class its requests are raised to while someone more urgent waits on it
+        self.wakeup = asyncio.Event()
+        self.dispatcher = None
+        self.granted = [0, 0, 0]
+
+    def _enqueue(self, entry):
+        future, priority, owner = entry
+        self.queues[priority].setdefault(owner, deque()).append(entry)
+
+    def _dequeue(self, entry):
+        queue = self.queues[entry[1]].get(entry[2])
+        if queue is not None and entry in queue:
+            queue.remove(entry)
+            if not queue:
+                del self.queues[entry[1]][entry[2]]
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE, owner=None, key=None):
+        """Wait until this request's turn comes and a token is available"""
+        priority = min(priority, self.boosts.get(owner, priority))
+        entry = [asyncio.get_running_loop().create_future(), priority, owner]
+        self._enqueue(entry)
+        if key is not None:
+            self.waiting[key] = entry
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self._dispatch())
+        self.wakeup.set()
+        try:
+            await entry[0]
+        finally:
+            if key is not None and self.waiting.get(key) is entry:
+                del self.waiting[key]
+            if not entry[0].done():
+                self._dequeue(entry)
+
+    def _move(self, entry, priority):
+        if priority < entry[1] and not entry[0].done():
+            self._dequeue(entry)
+            entry[1] = priority
+            self._enqueue(entry)
+            self.wakeup.set()
+
+    def promote(self, key, priority):
+        """Raise a queued request when a more urgent caller starts waiting for the same key"""
+        entry = self.waiting.get(key)
+        if entry is not None:
+            self._move(entry, priority)
+
+    def boost(self, owner, priority):
+        """Raise every current and future request of an owner to at least the given class"""
+        if priority >= self.boosts.get(owner, PRIORITY_BULK + 1):
+            return
+        self.boosts[owner] = priority
+        for queue in self.queues[priority + 1:]:
+            for entry in list(queue.get(owner, ())):
+                self._move(entry, priority)
+
+    def unboost(self, owner):
+        self.boosts.pop(owner, None)
+
+    def _pop_front(self, queue, owner, entries):
+        entry = entries.popleft()
+        if entries:
+            queue.move_to_end(owner)
+        else:
+            del queue[owner]
+        return entry
 
-            # Store cache time in a separate dictionary to avoid attribute issues
-            if not hasattr(self.bot, 'cache_times'):
-                self.bot.cache_times = {}
+    def _next_class(self):
+        for priority, queue in enumerate(self.queues):
+            if queue:
+                return priority
+        return None
 
-            try:
-                if cached_entry and selected_value in self.bot.cache_times:
-                    cache_age = current_time - self.bot.cache_times[selected_value]
-                    embed = cached_entry
-                    print(f"Using cached embed for {selected_value} (age: {cache_age/60:.1f} minutes)")
-                    # Update timestamp to show it's current
-                    embed.timestamp = datetime.now()
-                elif selected_value == "bosses_overview":
-                    embed = await self.bot.create_bosses_overview_embed()
-                    if isinstance(embed, discord.Embed):
-                        self.bot.cache_times[selected_value] = current_time
-                        embed.timestamp = datetime.now()
-                        self.cached_embeds["bosses_overview"] = embed
-                else:
-                    # For specific boss
-                    embed = await self.bot.create_single_category_embed(selected_value)
-                    if isinstance(embed, discord.Embed):
-                        self.bot.cache_times[selected_value] = current_time
-                        embed.timestamp = datetime.now()
-                        self.cached_embeds[selected_value] = embed
-            except Exception as embed_error:
-                print(f"Error creating embed for {selected_value}: {str(embed_error)}")
-                await interaction.edit_original_response(content=f"❌ Error creating {selected_value} highscores: {str(embed_error)}")
-
-                # Reset the view to non-loading state even when there's an error
+    async def _dispatch(self):
+        while True:
+            priority = self._next_class()
+            if priority is None:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            queue = self.queues[priority]
+            owner, entries = next(iter(queue.items()))
+            if entries[0][0].done():
+                self._pop_front(queue, owner, entries)  # The caller gave up while queued
+                continue
+
+            # Background classes only spend tokens beyond the reserve, so under load they yield to clicks
+            needed = 1 if priority == PRIORITY_INTERACTIVE else 1 + self.BACKGROUND_RESERVE
+            wait_time = self.rate_limiter.delay(needed)
+            if wait_time > 0:
+                # Re-check when a token frees up or sooner if a more urgent request arrives
+                self.wakeup.clear()
                 try:
-                    reset_view = HighscoresView(self.bot, self.cached_embeds, active_category="bosses", is_loading=False)
-                    await interaction.message.edit(view=reset_view)
-                except:
+                    await asyncio.wait_for(self.wakeup.wait(), wait_time)
+                except asyncio.TimeoutError:
                     pass
-                return
+                continue
+
+            # Serve the owner at the front of the class, then rotate it to the back
+            entry = self._pop_front(queue, owner, entries)
+            self.rate_limiter.take()
+            self.granted[priority] += 1
+            entry[0].set_result(None)
+
+    def stats(self):
+        return {
+            'queued': [sum(len(entries) for entries in queue.values()) for queue in self.queues],
+            'granted': list(self.granted),
+        }
+
+    async def close(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+            self.dispatcher = None
+
+# Persistent cache backends for WOMClient
+class CacheBackend:
+    """No-op backend: nothing survives a restart"""
+    async def get(self, key):
+        return None
 
-            # Create a new HighscoresView with cached embeds to replace the existing view (with loading state disabled)
-            new_view = HighscoresView(self.bot, self.cached_embeds, active_category="bosses", is_loading=False)
+    async def set(self, key, value, expires_at):
+        pass
 
-            edited = False
-            try:
-                await interaction.message.edit(embed=embed, view=new_view)
-                edited = True
-            except discord.errors.HTTPException as e:
-                print(f"Error editing message: {str(e)}")
-                # If edit fails, try to send a new message
-                try:
-                    new_message = await interaction.message.channel.send(embed=embed, view=new_view)
-                    self.bot.last_message = new_message
-                    edited = True
-                except Exception as e2:
-                    print(f"Error sending new message: {str(e2)}")
-
-            # Only send followup if we successfully edited the message
-            if edited:
-                # Update the "please wait" message instead of sending a new one
-                category_name = next((option.label for option in self.options if option.value == selected_value), selected_value)
-                # Provide minimal confirmation without redundant details
-                await interaction.edit_original_response(content=f"✅ {category_name} highscores loaded")
-            else:
-                await interaction.edit_original_response(content="❌ Failed to update the highscores display")
+    async def load_identities(self):
+        return []
 
-        except discord_errors.NotFound:
-            print(f"Interaction expired for {self.values[0] if hasattr(self, 'values') and self.values else 'unknown'}")
+    async def save_identities(self, records):
+        pass
+
+    async def load_guild_configs(self):
+        return []
+
+    async def save_guild_config(self, config):
+        pass
+
+    async def close(self):
+        pass
+
+class SQLiteCacheBackend(CacheBackend):
+    """Stores API responses with their expiry in a SQLite database (WAL mode)"""
+    # Expired rows are kept this long so they can still serve as a fallback when the API fails
+    STALE_RETENTION = 7 * 86400
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        # sqlite3 connections aren't safe to use from several threads at once
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS wom_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # Drop rows that are too old to be useful even as a fallback
+            self.conn.execute("DELETE FROM wom_cache WHERE expires_at < ?", (time.time() - self.STALE_RETENTION,))
+            # Player identities never expire: a player id keeps every name it has been seen under
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS player_identity ("
+                "id INTEGER PRIMARY KEY, username TEXT NOT NULL, display_name TEXT NOT NULL, aliases TEXT NOT NULL)"
+            )
+            # Which group each guild tracks and the highscores messages it has posted
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS guild_config ("
+                "guild_id INTEGER PRIMARY KEY, group_id INTEGER NOT NULL, messages TEXT NOT NULL)"
+            )
+            self.conn.commit()
+        return self.conn
+
+    def _get(self, key):
+        with self.lock:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM wom_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _set(self, key, value, expires_at):
+        payload = json.dumps(value, separators=(',', ':'))
+        with self.lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO wom_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at)
+            )
+            conn.commit()
+
+    def _load_identities(self):
+        with self.lock:
+            rows = self._connect().execute(
+                "SELECT id, username, display_name, aliases FROM player_identity"
+            ).fetchall()
+        return [
+            {'id': player_id, 'username': username, 'displayName': display_name, 'aliases': set(json.loads(aliases))}
+            for player_id, username, display_name, aliases in rows
+        ]
+
+    def _save_identities(self, records):
+        rows = [
+            (record['id'], record['username'], record['displayName'], json.dumps(sorted(record['aliases'])))
+            for record in records
+        ]
+        with self.lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO player_identity (id, username, display_name, aliases) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+
+    def _load_guild_configs(self):
+        with self.lock:
+            rows = self._connect().execute("SELECT guild_id, group_id, messages FROM guild_config").fetchall()
+        return [GuildConfig(guild_id, group_id, json.loads(messages)) for guild_id, group_id, messages in rows]
+
+    def _save_guild_config(self, config):
+        with self.lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO guild_config (guild_id, group_id, messages) VALUES (?, ?, ?)",
+                (config.guild_id, config.group_id, json.dumps(config.entries()))
+            )
+            conn.commit()
+
+    def _close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    # Disk I/O runs in a worker thread so it never blocks the event loop
+    async def get(self, key):
+        try:
+            return await asyncio.to_thread(self._get, key)
         except Exception as e:
-            print(f"Error in bosses dropdown callback: {str(e)}")
-            try:
-                # If the interaction hasn't been responded to yet
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
-                else:
-                    await interaction.edit_original_response(content=f"❌ An error occurred: {str(e)}")
-            except:
-                print(f"Could not update error message")
+            print(f"Error reading {key} from persistent cache: {str(e)}")
+            return None
 
-# Discord bot token
-import os
-TOKEN = os.environ.get('DISCORD_BOT_TOKEN', '')  # Get token from Replit secrets
+    async def set(self, key, value, expires_at):
+        try:
+            await asyncio.to_thread(self._set, key, value, expires_at)
+        except Exception as e:
+            print(f"Error writing {key} to persistent cache: {str(e)}")
+
+    async def load_identities(self):
+        try:
+            return await asyncio.to_thread(self._load_identities)
+        except Exception as e:
+            print(f"Error reading player identities from persistent cache: {str(e)}")
+            return []
+
+    async def save_identities(self, records):
+        try:
+            await asyncio.to_thread(self._save_identities, records)
+        except Exception as e:
+            print(f"Error writing player identities to persistent cache: {str(e)}")
+
+    async def load_guild_configs(self):
+        try:
+            return await asyncio.to_thread(self._load_guild_configs)
+        except Exception as e:
+            print(f"Error reading guild settings from persistent cache: {str(e)}")
+            return []
+
+    async def save_guild_config(self, config):
+        try:
+            await asyncio.to_thread(self._save_guild_config, config)
+        except Exception as e:
+            print(f"Error writing guild settings to persistent cache: {str(e)}")
+
+    async def close(self):
+        await asyncio.to_thread(self._close)
+
+# Canonical player records keyed by WOM player id
+class PlayerIdentityIndex:
+    """Maps every display name and alias a player has been seen under to their WOM player id"""
+    def __init__(self):
+        self.records = {}  # player id -> {'id', 'username', 'displayName', 'aliases': set of lowercase names}
+        self.by_name = {}  # lowercase name or alias -> player id
+        self.dirty = set()  # ids changed since they were last persisted
+
+    def __len__(self):
+        return len(self.records)
+
+    def _add_name(self, record, name):
+        name = name.lower()
+        # A name freed by a rename can be taken by someone else; the newest sighting wins
+        self.by_name[name] = record['id']
+        if name not in record['aliases']:
+            record['aliases'].add(name)
+            self.dirty.add(record['id'])
+
+    def load(self, records):
+        for record in records:
+            self.records[record['id']] = record
+            for name in record['aliases']:
+                self.by_name.setdefault(name, record['id'])
+        # Current names take precedence over old aliases
+        for record in records:
+            self.by_name[record['username'].lower()] = record['id']
+            self.by_name[record['displayName'].lower()] = record['id']
+
+    def observe(self, player):
+        """Record a player object from any WOM response, returning its id"""
+        player_id = player.get('id') if isinstance(player, dict) else None
+        if not player_id:
+            return None
+        username = player.get('username') or ''
+        display_name = player.get('displayName') or username
+        record = self.records.get(player_id)
+        if record is None:
+            record = {'id': player_id, 'username': username, 'displayName': display_name, 'aliases': set()}
+            self.records[player_id] = record
+            self.dirty.add(player_id)
+        elif (username and record['username'] != username) or (display_name and record['displayName'] != display_name):
+            # Renamed: the old names stay as aliases
+            record['username'] = username or record['username']
+            record['displayName'] = display_name or record['displayName']
+            self.dirty.add(player_id)
+        for name in (username, display_name):
+            if name:
+                self._add_name(record, name)
+        return player_id
+
+    def observe_response(self, data):
+        """Record every player object in a group, hiscores or player details response"""
+        if isinstance(data, list):
+            for entry in data:
+                if isinstance(entry, dict):
+                    self.observe(entry.get('player'))
+        elif isinstance(data, dict):
+            for membership in data.get('memberships') or ():
+                self.observe(membership.get('player'))
+            if 'username' in data:
+                self.observe(data)
+
+    def resolve(self, name):
+        """Player id a display name or alias belongs to, or None if it has never been seen"""
+        return self.by_name.get(name.lower())
+
+    def key(self, player):
+        """Canonical key for a name or player object: the WOM player id when known, else the lowercase name"""
+        if isinstance(player, dict):
+            return self.observe(player) or (player.get('username') or player.get('displayName') or '').lower()
+        player_id = self.by_name.get(player.lower())
+        return player_id if player_id is not None else player.lower()
+
+    def take_dirty(self):
+        records = [self.records[player_id] for player_id in self.dirty if player_id in self.records]
+        self.dirty.clear()
+        return records
 
 # WiseOldMan API client
 class WOMClient:
-    def __init__(self):
+    def __init__(self, cache_backend=None):
         self.base_url = "https://api.wiseoldman.net/v2"
-        self.session = requests.Session()  # Use a persistent session for connection pooling
-        self.cache = {}  # Simple cache for API responses
-        self.cache_expiry = {}  # Track when cache entries expire
+        # aiohttp session is created lazily because it must be bound to the running event loop
+        self.session = None
         self.CACHE_DURATION = 86400  # Cache duration in seconds (24 hours)
-        self.api_semaphore = asyncio.Semaphore(5) # Added semaphore here
+        # Bounded cache for API responses; expired entries are kept a while longer as a fallback
+        # when the API fails, the same window the persistent backend keeps them for
+        self.cache = TTLCache(
+            "wom",
+            max_entries=5000,
+            max_bytes=64 * 1024 * 1024,
+            default_ttl=self.CACHE_DURATION,
+            stale_ttl=SQLiteCacheBackend.STALE_RETENTION,
+            namespace=lambda key: '_'.join(key.split('_')[:2])
+        )
+        # Responses are also persisted so a restart starts with a warm cache
+        if cache_backend is None:
+            cache_backend = SQLiteCacheBackend(WOM_CACHE_PATH) if WOM_CACHE_PATH else CacheBackend()
+        self.cache_backend = cache_backend
+        # Every player seen in a response, keyed by WOM player id, so renames and case differences share cache entries
+        self.identities = PlayerIdentityIndex()
+        self.identities_loaded = False
+        # One token bucket paces every request this client sends
+        self.rate_limiter = AdaptiveRateLimiter()
+        # Requests queue for tokens by priority so user-facing fetches go ahead of background work
+        self.scheduler = RequestScheduler(self.rate_limiter)
         self.user_agent = "Discord Highscores Bot (https://github.com/yourusername/yourrepo)" # Added User-Agent
 
-    async def _get_cached_or_fetch(self, cache_key, url, params=None, timeout=15):
+        # Connection pool tuning for the aiohttp transport
+        self.POOL_SIZE = 20  # Total open connections kept by the pool
+        self.POOL_SIZE_PER_HOST = 10  # Everything goes to api.wiseoldman.net
+        self.KEEPALIVE_TIMEOUT = 60  # Seconds an idle connection is kept for reuse
+        self.CONNECT_TIMEOUT = 5  # Seconds allowed for TCP/TLS connect
+        self.HISCORES_PAGE_SIZE = 50  # Largest page the WOM group hiscores endpoint returns
+        self.HISCORES_PREFETCH_PAGES = 3  # Pages of one leaderboard fetched concurrently
+
+        # Single-flight table: cache key -> task fetching it right now
+        self.in_flight = {}
+        self.fetch_waiters = {}  # Cache key -> callers waiting on its in-flight fetch
+        # 'fetches' counts requests actually started, 'coalesced' counts duplicate callers folded into one,
+        # 'dropped' counts queued requests cancelled because every caller gave up
+        self.request_stats = {'fetches': 0, 'coalesced': 0, 'dropped': 0}
+
+    async def _get_session(self):
+        """Return the shared aiohttp session, creating it on first use"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.POOL_SIZE,
+                limit_per_host=self.POOL_SIZE_PER_HOST,
+                keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    'User-Agent': self.user_agent,
+                    'Accept': 'application/json',
+                    'Accept-Encoding': 'gzip, deflate'
+                },
+                auto_decompress=True
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        await self.scheduler.close()
+        await self.cache_backend.close()
+
+    async def _get_cached_or_fetch(self, cache_key, url, params=None, timeout=15, force=False):
         current_time = time.time()
 
-        # Check if we have a cached response and it's still valid
-        if cache_key in self.cache and current_time < self.cache_expiry.get(cache_key, 0):
-            print(f"Using cached data for {cache_key} (age: {(current_time - (self.cache_expiry.get(cache_key, 0) - self.CACHE_DURATION))/60:.1f} minutes)")
-            return self.cache[cache_key]
+        # Check if we have a cached response and it's still valid (force skips the cache lookup)
+        # Builds that need fresher data than the cache TTL set a maximum acceptable age
+        max_age = wom_max_age.get()
+        if max_age is not None and cache_key in self.cache and current_time - self.cache.stored_at(cache_key) > max_age:
+            force = True
+
+        if not force:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"Using cached data for {cache_key} (age: {(current_time - self.cache.stored_at(cache_key))/60:.1f} minutes)")
+                return cached
+
+        # If another caller is already fetching this key, wait for its result instead of
+        # sending a duplicate request
+        in_flight = self.in_flight.get(cache_key)
+        # A fetch its callers all gave up on is being cancelled; joining it would cancel this caller too
+        if in_flight is not None and not in_flight.done() and not in_flight.cancelling():
+            self.request_stats['coalesced'] += 1
+            # A more urgent caller pulls the queued request forward
+            self.scheduler.promote(cache_key, wom_priority.get())
+            with trace_span("fetch"):
+                return await self._join_fetch(cache_key, in_flight)
+
+        # Run the fetch as its own task so a cancelled caller doesn't cancel the other waiters
+        self.request_stats['fetches'] += 1
+        fetch_task = asyncio.ensure_future(self._load_or_fetch(cache_key, url, params, timeout, force, max_age))
+        self.in_flight[cache_key] = fetch_task
+        fetch_task.add_done_callback(lambda _: self._forget_fetch(cache_key, fetch_task))
+        with trace_span("fetch"):
+            return await self._join_fetch(cache_key, fetch_task)
+
+    async def _join_fetch(self, cache_key, fetch_task):
+        # Count the callers of each fetch, so one they all gave up on is dropped before it's sent
+        self.fetch_waiters[cache_key] = self.fetch_waiters.get(cache_key, 0) + 1
+        try:
+            return await asyncio.shield(fetch_task)
+        finally:
+            self.fetch_waiters[cache_key] -= 1
+            if not self.fetch_waiters[cache_key]:
+                del self.fetch_waiters[cache_key]
+                # Only requests still queued are dropped; one already on the wire is left to fill the cache
+                if not fetch_task.done() and cache_key in self.scheduler.waiting:
+                    self.request_stats['dropped'] += 1
+                    fetch_task.cancel()
+                    self._forget_fetch(cache_key, fetch_task)
+
+    def _forget_fetch(self, cache_key, fetch_task):
+        # A newer fetch of the key may have replaced this one already
+        if self.in_flight.get(cache_key) is fetch_task:
+            del self.in_flight[cache_key]
+
+    async def load_identities(self):
+        """Load the persisted identity index once, before names are resolved"""
+        if not self.identities_loaded:
+            self.identities_loaded = True
+            self.identities.load(await self.cache_backend.load_identities())
+            print(f"Loaded {len(self.identities)} player identities")
+
+    async def _record_identities(self, data):
+        # Every fresh response teaches the index about the players in it
+        self.identities.observe_response(data)
+        if self.identities.dirty:
+            await self.cache_backend.save_identities(self.identities.take_dirty())
+
+    async def _load_or_fetch(self, cache_key, url, params=None, timeout=15, force=False, max_age=None):
+        # Lazily pull a persisted copy into memory the first time a key is asked for
+        if cache_key not in self.cache:
+            stored = await self.cache_backend.get(cache_key)
+            if stored is not None:
+                data, expires_at = stored
+                stored_at = expires_at - self.CACHE_DURATION
+                self.cache.set(cache_key, data, expires_at=expires_at, stored_at=stored_at)
+                too_old = max_age is not None and time.time() - stored_at > max_age
+                if not force and not too_old and time.time() < expires_at:
+                    print(f"Using persisted data for {cache_key}")
+                    return data
+                # An expired copy is still kept in memory as a fallback if the fetch fails
+
+        return await self._fetch_with_retries(cache_key, url, params, timeout)
+
+    async def _fetch_with_retries(self, cache_key, url, params=None, timeout=15):
+        current_time = time.time()
 
         # Make the API request with retry logic for rate limits
         max_retries = 5  # Increased max retries
         retry_count = 0
+        endpoint = self.cache.namespace(cache_key)  # e.g. "player_details", for metric labels
 
         while retry_count <= max_retries:
+            request_started = None
             try:
-                async with self.api_semaphore: # Acquire semaphore before making request
-                    headers = {'User-Agent': self.user_agent} #Added User-Agent to headers
-                    response = self.session.get(url, params=params, timeout=timeout, headers=headers)
-
-                if response.status_code == 200:
+                # Wait for our turn and a rate limit token before making the request
+                await self.scheduler.acquire(wom_priority.get(), wom_request_owner.get(), key=cache_key)
+                session = await self._get_session()
+                request_timeout = aiohttp.ClientTimeout(total=timeout, connect=self.CONNECT_TIMEOUT)
+                request_started = time.perf_counter()
+                async with session.get(url, params=params, timeout=request_timeout) as response:
+                    status_code = response.status
+                    retry_after = self.rate_limiter.update(response.headers, status_code)
+                    # Read the body while the connection is held so it goes back to the pool
+                    body = await response.read() if status_code == 200 else None
+                WOM_REQUEST_SECONDS.observe(time.perf_counter() - request_started, endpoint, status_code)
+
+                if status_code == 200:
                     try:
-                        data = response.json()
+                        data = json.loads(body)
                         # Cache the successful response
-                        self.cache[cache_key] = data
-                        self.cache_expiry[cache_key] = current_time + self.CACHE_DURATION
+                        self.cache.set(cache_key, data, expires_at=current_time + self.CACHE_DURATION)
+                        await self.cache_backend.set(cache_key, data, current_time + self.CACHE_DURATION)
+                        await self._record_identities(data)
                         return data
                     except ValueError as json_error:
                         print(f"JSON parsing error for {url}: {str(json_error)}")
@@ -560,26 +1271,36 @@ class WOMClient:
                             print(f"Using older cached data for {cache_key} after JSON parse error")
                             return self.cache[cache_key]
                         return None
-                elif response.status_code == 429:
-                    # Rate limited - implement exponential backoff with jitter
-                    base_wait_time = 2.0 * (2 ** retry_count)  # 2, 4, 8, 16, 32 seconds
-                    # Add jitter (±20%)
-                    jitter = base_wait_time * 0.2 * (2 * random.random() - 1)
-                    wait_time = base_wait_time + jitter
+                elif status_code == 429:
+                    # Rate limited - wait exactly as long as the API asks, or back off exponentially with jitter
+                    if retry_after is not None:
+                        wait_time = retry_after
+                    else:
+                        base_wait_time = 2.0 * (2 ** retry_count)  # 2, 4, 8, 16, 32 seconds
+                        # Add jitter (±20%)
+                        jitter = base_wait_time * 0.2 * (2 * random.random() - 1)
+                        wait_time = base_wait_time + jitter
+                        self.rate_limiter.block(wait_time)
                     print(f"Rate limited (429) for {url}, waiting {wait_time:.1f}s before retry ({retry_count+1}/{max_retries+1})")
-                    await asyncio.sleep(wait_time)
+                    WOM_RATE_LIMITED.inc(endpoint)
+                    # The limiter holds every request (this retry included) until the wait is over
                     retry_count += 1
+                    if retry_count <= max_retries:
+                        WOM_RETRIES.inc(endpoint, "rate_limited")
                 else:
-                    print(f"API returned status code {response.status_code} for {url}")
+                    print(f"API returned status code {status_code} for {url}")
                     # Check if we have cached data we can use instead
                     if cache_key in self.cache:
                         print(f"Using older cached data for {cache_key} as fallback")
                         return self.cache[cache_key]
                     return None
-            except requests.exceptions.Timeout:
+            except asyncio.TimeoutError:
                 print(f"Request timeout for {url}, attempt {retry_count+1}/{max_retries+1}")
+                if request_started is not None:
+                    WOM_REQUEST_SECONDS.observe(time.perf_counter() - request_started, endpoint, "timeout")
                 retry_count += 1
                 if retry_count <= max_retries:
+                    WOM_RETRIES.inc(endpoint, "timeout")
                     await asyncio.sleep(2.0)  # Increased wait time
                 else:
                     # Check if we have cached data we can use instead
@@ -589,8 +1310,11 @@ class WOMClient:
                     return None
             except Exception as e:
                 print(f"API request error for {url}: {str(e)}")
+                if request_started is not None:
+                    WOM_REQUEST_SECONDS.observe(time.perf_counter() - request_started, endpoint, "error")
                 retry_count += 1
                 if retry_count <= max_retries:
+                    WOM_RETRIES.inc(endpoint, "error")
                     await asyncio.sleep(2.0)  # Increased wait time
                 else:
                     # Check if we have cached data we can use instead
@@ -602,24 +1326,95 @@ class WOMClient:
         # If we've exhausted all retries
         return None
 
-    async def get_group_details(self, group_id):
+    async def get_group_details(self, group_id, force=False):
         cache_key = f"group_details_{group_id}"
         url = f"{self.base_url}/groups/{group_id}"
-        return await self._get_cached_or_fetch(cache_key, url)
+        return await self._get_cached_or_fetch(cache_key, url, force=force)
 
-    async def get_group_hiscores(self, group_id, metric='overall'):
+    async def get_group_hiscores(self, group_id, metric='overall', limit=None, offset=0, force=False):
         cache_key = f"group_hiscores_{group_id}_{metric}"
         url = f"{self.base_url}/groups/{group_id}/hiscores"
         params = {'metric': metric}
-        return await self._get_cached_or_fetch(cache_key, url, params)
+        if limit is not None:
+            # Paged requests are cached per page
+            cache_key = f"{cache_key}_{offset}_{limit}"
+            params['limit'] = limit
+            params['offset'] = offset
+        return await self._get_cached_or_fetch(cache_key, url, params, force=force)
+
+    async def iter_group_hiscores(self, group_id, metric='overall', max_rows=None, force=False):
+        """Stream a metric's group leaderboard row by row, fetching the next pages concurrently"""
+        page_size = self.HISCORES_PAGE_SIZE
+        pending = deque()
+        next_offset = 0
+        rows_yielded = 0
+        # Start with a single page so small groups don't pay for speculative requests
+        window = 1
 
-    async def get_player_details(self, username):
         try:
-            cache_key = f"player_details_{username}"
-            url = f"{self.base_url}/players/{username}"
+            while True:
+                # Keep a window of page requests in flight ahead of the consumer; read-ahead pages
+                # are sent as prefetches so they don't hold up anyone's current page
+                while len(pending) < window and (max_rows is None or next_offset < max_rows):
+                    priority = max(wom_priority.get(), PRIORITY_PREFETCH) if pending else wom_priority.get()
+                    pending.append(asyncio.ensure_future(run_with_priority(
+                        priority, self.get_group_hiscores, group_id, metric, limit=page_size, offset=next_offset, force=force
+                    )))
+                    next_offset += page_size
+
+                if not pending:
+                    return
+
+                page = await pending.popleft()
+                if not page:
+                    return
+
+                for entry in page:
+                    yield entry
+                    rows_yielded += 1
+                    if max_rows is not None and rows_yielded >= max_rows:
+                        return
+
+                if len(page) < page_size:
+                    return
+
+                # A full page means the leaderboard continues, so start fetching further ahead
+                window = self.HISCORES_PREFETCH_PAGES
+        finally:
+            # Pages the consumer no longer needs are dropped; fetches already started still land in the cache
+            for page_task in pending:
+                page_task.cancel()
+
+    async def get_top_group_hiscores(self, group_id, metric='overall', max_rows=None, force=False):
+        """Collect up to max_rows leaderboard rows (the whole leaderboard when max_rows is None)"""
+        rows = [entry async for entry in self.iter_group_hiscores(group_id, metric, max_rows=max_rows, force=force)]
+        return rows or None
+
+    async def get_all_group_hiscores(self, group_id, metric='overall', force=False):
+        """Fetch every member's row for a metric by walking the paginated hiscores"""
+        return await self.get_top_group_hiscores(group_id, metric, force=force)
 
-            data = await self._get_cached_or_fetch(cache_key, url, timeout=15)
+    async def get_player_details(self, username, force=False):
+        try:
+            # Known players are cached and fetched by id, so any of their names or aliases hits the same entry
+            await self.load_identities()
+            player_id = self.identities.resolve(username)
+            if player_id is not None:
+                cache_key = f"player_details_id_{player_id}"
+                url = f"{self.base_url}/players/id/{player_id}"
+            else:
+                cache_key = f"player_details_{username.lower()}"
+                url = f"{self.base_url}/players/{username}"
+
+            data = await self._get_cached_or_fetch(cache_key, url, timeout=15, force=force)
             if data:
+                if player_id is None and data.get('id'):
+                    # First sighting by name: file the snapshot under the id for later lookups
+                    id_key = f"player_details_id_{data['id']}"
+                    expires_at = self.cache.expires_at(cache_key)
+                    if id_key not in self.cache and expires_at is not None:
+                        self.cache.set(id_key, data, expires_at=expires_at, stored_at=self.cache.stored_at(cache_key))
+                        await self.cache_backend.set(id_key, data, expires_at)
                 return data
 
             # If we got here, something went wrong but was handled in _get_cached_or_fetch
@@ -628,6 +1423,448 @@ class WOMClient:
             print(f"Error fetching player details for {username}: {str(e)}")
             return None
 
+# Outcomes of validating a player against the combat skill rule
+PLAYER_VALID = "valid"
+PLAYER_INVALID = "invalid"
+PLAYER_UNKNOWN = "unknown"  # Couldn't tell (fetch failed or snapshot incomplete); shown for now and re-checked later
+
+# Applies the ≤ 2 Attack/Strength/Magic/Ranged rule to a WOM player snapshot.
+# Returns True/False, or None when the snapshot is missing the data needed to decide.
+def check_combat_skills(player_details, restricted_skills):
+    try:
+        skills = player_details['latestSnapshot']['data']['skills']
+    except (KeyError, TypeError):
+        return None
+
+    for skill_name in restricted_skills:
+        if skill_name not in skills or 'level' not in skills[skill_name]:
+            return None
+        if skills[skill_name]['level'] > 2:
+            return False
+    return True
+
+# Columnar member stats: one row per member, one array per metric
+class MemberStatsTable:
+    MISSING = -1  # Value stored when a member has no data for a metric
+
+    def __init__(self):
+        self.names = []  # Interned display names, indexed by row
+        self.ids = []
+        self.usernames = []
+        self.keys = []  # Player key per row: WOM id, or lowercase username if unknown
+        self.row_of = {}  # player key -> row
+        self.kinds = {}  # metric -> 'skill' or 'boss'
+        self.values = {}  # metric -> array('q') of experience (skills) or kills (bosses)
+        self.levels = {}  # skill metric -> array('h') of levels
+
+    def __len__(self):
+        return len(self.names)
+
+    def _column(self, columns, metric, typecode, row_count):
+        column = columns.get(metric)
+        if column is None:
+            # Metrics first seen part way through get MISSING for the earlier rows
+            column = array(typecode, [self.MISSING]) * row_count
+            columns[metric] = column
+        return column
+
+    def add_member(self, player, snapshot_data, key=None):
+        row = len(self.names)
+        name = sys.intern(player['displayName'])
+        self.names.append(name)
+        self.ids.append(player.get('id') or 0)
+        self.usernames.append(sys.intern(player.get('username') or name.lower()))
+        self.keys.append(key if key is not None else self.usernames[row])
+        self.row_of[self.keys[row]] = row
+
+        for column in self.values.values():
+            column.append(self.MISSING)
+        for column in self.levels.values():
+            column.append(self.MISSING)
+
+        for metric, data in (snapshot_data.get('skills') or {}).items():
+            self.kinds[metric] = 'skill'
+            self._column(self.values, metric, 'q', row + 1)[row] = data.get('experience', self.MISSING)
+            self._column(self.levels, metric, 'h', row + 1)[row] = data.get('level', self.MISSING)
+        for metric, data in (snapshot_data.get('bosses') or {}).items():
+            self.kinds[metric] = 'boss'
+            self._column(self.values, metric, 'q', row + 1)[row] = data.get('kills', self.MISSING)
+        return row
+
+    def copy(self):
+        """Table with its own metric columns; the roster lists are shared since a copy never changes them"""
+        table = MemberStatsTable()
+        table.names = self.names
+        table.ids = self.ids
+        table.usernames = self.usernames
+        table.keys = self.keys
+        table.row_of = self.row_of
+        table.kinds = dict(self.kinds)
+        table.values = {metric: column[:] for metric, column in self.values.items()}
+        table.levels = {metric: column[:] for metric, column in self.levels.items()}
+        return table
+
+    def update_member(self, row, snapshot_data):
+        """Overwrite a member's stats in place, returning the metrics whose values changed"""
+        changed = set()
+        seen = set()
+        for metric, data in (snapshot_data.get('skills') or {}).items():
+            seen.add(metric)
+            self.kinds[metric] = 'skill'
+            values = self._column(self.values, metric, 'q', len(self))
+            levels = self._column(self.levels, metric, 'h', len(self))
+            experience = data.get('experience', self.MISSING)
+            level = data.get('level', self.MISSING)
+            if values[row] != experience or levels[row] != level:
+                values[row] = experience
+                levels[row] = level
+                changed.add(metric)
+        for metric, data in (snapshot_data.get('bosses') or {}).items():
+            seen.add(metric)
+            self.kinds[metric] = 'boss'
+            values = self._column(self.values, metric, 'q', len(self))
+            kills = data.get('kills', self.MISSING)
+            if values[row] != kills:
+                values[row] = kills
+                changed.add(metric)
+        # Metrics that disappeared from the snapshot go back to MISSING
+        for metric, values in self.values.items():
+            if metric not in seen and values[row] != self.MISSING:
+                values[row] = self.MISSING
+                if metric in self.levels:
+                    self.levels[metric][row] = self.MISSING
+                changed.add(metric)
+        return changed
+
+    def combat_validity(self, restricted_skills, max_level=2):
+        """Column-wise combat rule: 1 = passes, 0 = over max_level, -1 = data missing"""
+        columns = [self.levels.get(skill) or array('h', [self.MISSING]) * len(self) for skill in restricted_skills]
+        return array('b', [
+            0 if max(levels) > max_level else (-1 if min(levels) == self.MISSING else 1)
+            for levels in zip(*columns)
+        ])
+
+    def top_k(self, metric, k=None, mask=None, by_level=False):
+        """Row indices of the k best members with a positive value, optionally only where mask is set"""
+        values = self.values.get(metric)
+        if values is None:
+            return []
+        candidates = [i for i, value in enumerate(values) if value > 0 and (mask is None or mask[i])]
+        if by_level and metric in self.levels:
+            levels = self.levels[metric]
+            key = lambda i: (levels[i], values[i])
+        else:
+            key = values.__getitem__
+        if k is None or k >= len(candidates):
+            return sorted(candidates, key=key, reverse=True)
+        # Partial selection: O(n log k) instead of sorting every member
+        return heapq.nlargest(k, candidates, key=key)
+
+    def entry(self, index, metric):
+        """Hiscores-shaped row for one member and metric"""
+        player = {'id': self.ids[index], 'username': self.usernames[index], 'displayName': self.names[index]}
+        if self.kinds.get(metric) == 'skill':
+            data = {'metric': metric, 'level': self.levels[metric][index], 'experience': self.values[metric][index]}
+        else:
+            data = {'metric': metric, 'kills': self.values[metric][index]}
+        return {'player': player, 'data': data}
+
+class LeaderboardResult:
+    """Every ranked leaderboard for a group, computed in one pass over member snapshots"""
+    def __init__(self, table, include_mask, validity, member_count, built_at):
+        self.table = table
+        self.include_mask = include_mask  # Rows that pass (or can't be checked against) the combat rule
+        self.validity = validity  # player key -> passes the combat rule
+        self.member_count = member_count
+        self.built_at = built_at
+        self.ranked = {}  # (metric, max_rows) -> materialised rows, built on first use
+
+    def ranked_rows(self, metric, max_rows=None):
+        """Hiscores-shaped rows of qualifying players for a metric, best first"""
+        key = (metric, max_rows)
+        rows = self.ranked.get(key)
+        if rows is None:
+            indices = self.table.top_k(metric, max_rows, mask=self.include_mask)
+            rows = [self.table.entry(i, metric) for i in indices]
+            self.ranked[key] = rows
+        return rows
+
+# Local leaderboard engine: one snapshot fetch per member instead of one hiscores call per metric
+class LeaderboardEngine:
+    # Don't publish a result if more than this share of member snapshots couldn't be fetched
+    MAX_MISSING_FRACTION = 0.1
+
+    def __init__(self, wom_client, group_id, restricted_skills):
+        self.wom_client = wom_client
+        self.group_id = group_id
+        self.restricted_skills = restricted_skills
+        self.result = None
+        self.refresh_task = None
+        # Last snapshot data and change marker used for each member, keyed by WOM player id
+        # (through the identity index) so a rename doesn't refetch the member
+        self.snapshots = {}
+        self.versions = {}
+        # Metrics whose rankings changed in the last refresh (None = everything was rebuilt)
+        self.changed_metrics = None
+
+    @staticmethod
+    def member_version(player):
+        # WOM bumps lastChangedAt when a player's stats change; updatedAt on every update
+        return player.get('lastChangedAt') or player.get('updatedAt')
+
+    async def refresh(self):
+        """Rebuild every leaderboard, sharing a refresh that's already running"""
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self._refresh())
+            self.refresh_task.add_done_callback(lambda _: self.wom_client.scheduler.unboost((self.group_id, "leaderboards")))
+        else:
+            self.wom_client.scheduler.boost((self.group_id, "leaderboards"), wom_priority.get())
+        return await asyncio.shield(self.refresh_task)
+
+    async def _fetch_member(self, member):
+        # The cached snapshot is fine as long as it's from the member's current version
+        details = await self.wom_client.get_player_details(member['username'])
+        version = self.member_version(member)
+        if details and version and self.member_version(details) != version:
+            details = await self.wom_client.get_player_details(member['username'], force=True)
+        return details
+
+    async def _refresh(self):
+        wom_request_owner.set((self.group_id, "leaderboards"))
+        started = time.time()
+        # Membership data carries each player's change marker, so it's always fetched fresh after the first build
+        group = await self.wom_client.get_group_details(self.group_id, force=self.result is not None)
+        if not group or not group.get('memberships'):
+            print("Could not load group memberships, keeping the previous leaderboards")
+            return self.result
+
+        members = [membership['player'] for membership in group['memberships'] if membership.get('player')]
+        identities = self.wom_client.identities
+        keys = [identities.key(member) for member in members]
+
+        # Only members whose stats changed since their stored snapshot are refetched
+        changed_members = [
+            (key, member) for key, member in zip(keys, members)
+            if key not in self.snapshots or self.versions.get(key) != self.member_version(member)
+        ]
+        fetched = await asyncio.gather(*[self._fetch_member(member) for key, member in changed_members])
+
+        changed_keys = set()
+        for (key, member), details in zip(changed_members, fetched):
+            if details:
+                self.snapshots[key] = (details.get('latestSnapshot') or {}).get('data') or {}
+                self.versions[key] = self.member_version(member) or self.member_version(details)
+                changed_keys.add(key)
+
+        missing = sum(1 for key in keys if key not in self.snapshots)
+        if members and missing / len(members) > self.MAX_MISSING_FRACTION:
+            print(f"Missing {missing}/{len(members)} member snapshots, keeping the previous leaderboards")
+            return self.result
+
+        previous = self.result
+        roster = [(key, member.get('displayName')) for key, member in zip(keys, members) if key in self.snapshots]
+        if previous is None or roster != list(zip(previous.table.keys, previous.table.names)):
+            # First build, the roster changed or someone was renamed: rebuild the whole table
+            table = MemberStatsTable()
+            for key, member in zip(keys, members):
+                if key in self.snapshots:
+                    table.add_member(member, self.snapshots[key], key=key)
+            changed_metrics = None
+        else:
+            # Same roster: patch only the changed members' rows, on a copy so the published result stays intact
+            table = previous.table.copy()
+            changed_metrics = set()
+            for key in changed_keys:
+                changed_metrics |= table.update_member(table.row_of[key], self.snapshots[key])
+
+        # The pure filter runs once over the combat columns; unknown results are included like in is_valid_player
+        combat = table.combat_validity(self.restricted_skills)
+        include_mask = array('b', [state != 0 for state in combat])
+        validity = {key: state == 1 for key, state in zip(table.keys, combat) if state != -1}
+
+        if changed_metrics is not None:
+            # A member who started or stopped passing the rule affects every leaderboard they're on
+            for row, (now_included, was_included) in enumerate(zip(include_mask, previous.include_mask)):
+                if now_included != was_included:
+                    changed_metrics |= {metric for metric, values in table.values.items() if values[row] > 0}
+
+        result = LeaderboardResult(table, include_mask, validity, len(members), time.time())
+        if changed_metrics is not None:
+            # Rankings for untouched metrics carry over without being recomputed
+            result.ranked = {key: rows for key, rows in previous.ranked.items() if key[0] not in changed_metrics}
+        self.result = result
+        self.changed_metrics = changed_metrics
+
+        if changed_metrics is None:
+            print(f"Built {len(table.values)} leaderboards from {len(table)} member snapshots in {time.time() - started:.1f}s")
+        else:
+            print(f"Refreshed {len(changed_keys)} changed members, {len(changed_metrics)} leaderboards affected in {time.time() - started:.1f}s")
+        return self.result
+
+# View data: what a leaderboard view shows, kept apart from how it's rendered
+def view_field(name, lines, inline=False, empty=None):
+    """One embed field as a tuple of ranked lines, with the text shown when there are none"""
+    return {'name': name, 'lines': tuple(lines), 'inline': inline, 'empty': empty}
+
+def leaderboard_view(title, description, fields, footer_note=None, color=0x3498db, stamped=True):
+    return {
+        'title': title,
+        'description': description,
+        'color': color,
+        'fields': tuple(fields),
+        'footer_note': footer_note,  # Shown after the "Last updated" time
+        'stamped': stamped,  # Whether the embed carries a timestamp and footer
+    }
+
+def error_view(description):
+    return leaderboard_view("Error", description, [], color=0xFF0000, stamped=False)
+
+# Rendered embeds: frozen payloads shared by every message that shows a view
+class RenderedEmbed:
+    """An embed rendered from one generation of view data; never mutated once built"""
+    __slots__ = ('view_type', 'generation', 'payload', 'footer_note', 'stamped', 'rendered_at', 'embed')
+
+    def __init__(self, view_type, generation, payload, footer_note=None, stamped=True, rendered_at=None):
+        self.view_type = view_type
+        self.generation = generation  # Hash of the view data the payload was rendered from
+        self.payload = payload
+        self.footer_note = footer_note
+        self.stamped = stamped
+        self.rendered_at = rendered_at or datetime.now()
+        # Built once and handed to every interaction as-is, so nothing may modify it
+        self.embed = discord.Embed.from_dict(self.to_dict())
+
+    def to_dict(self):
+        """The Discord embed payload, with this rendering's timestamp and footer"""
+        if not self.stamped:
+            return dict(self.payload)
+        footer = " | ".join(filter(None, ["Last updated", self.rendered_at.strftime('%I:%M %p'), self.footer_note]))
+        return dict(self.payload, timestamp=self.rendered_at.astimezone().isoformat(), footer={'text': footer})
+
+    def restamp(self, rendered_at=None):
+        """Copy with a new timestamp and footer; the rendered fields are shared, not rendered again"""
+        return RenderedEmbed(self.view_type, self.generation, self.payload, self.footer_note, self.stamped, rendered_at)
+
+def view_generation(view):
+    """Content hash identifying one generation of a view's data"""
+    return hashlib.sha1(json.dumps(view, sort_keys=True, default=str).encode()).hexdigest()
+
+def render_view(view_type, view, generation=None):
+    """Render view data into a frozen embed payload"""
+    payload = {
+        'type': 'rich',
+        'title': view['title'],
+        'description': view['description'],
+        'color': view['color'],
+        'fields': tuple(
+            {'name': field['name'], 'value': "\n".join(field['lines']) or field['empty'], 'inline': field['inline']}
+            for field in view['fields']
+        ),
+    }
+    return RenderedEmbed(view_type, generation or view_generation(view), payload, view['footer_note'], view['stamped'])
+
+# Per-guild settings
+class GuildConfig:
+    """The WOM group a guild tracks and the highscores messages it has posted there"""
+    MAX_MESSAGES = 10  # Posted messages remembered per guild; the newest is the one !refresh edits
+    __slots__ = ('guild_id', 'group_id', 'messages', 'views')
+
+    def __init__(self, guild_id, group_id, entries=None):
+        self.guild_id = guild_id
+        self.group_id = group_id
+        self.messages = []  # (channel id, message id), oldest first
+        self.views = {}  # Message id -> (view type, category, data generation it was last edited to)
+        for entry in entries or []:
+            self.messages.append((entry[0], entry[1]))
+            # Rows saved before views were persisted only hold the ids
+            if len(entry) >= 5:
+                self.views[entry[1]] = tuple(entry[2:5])
+
+    def entries(self):
+        """Tracked messages as persisted: channel id, message id, then what the message shows if known"""
+        return [[channel_id, message_id, *self.views.get(message_id, ())] for channel_id, message_id in self.messages]
+
+    def track(self, message):
+        entry = (message.channel.id, message.id)
+        if entry in self.messages:
+            self.messages.remove(entry)
+        self.messages.append(entry)
+        for channel_id, message_id in self.messages[:-self.MAX_MESSAGES]:
+            self.views.pop(message_id, None)
+        del self.messages[:-self.MAX_MESSAGES]
+
+    def is_tracked(self, message_id):
+        return any(tracked_id == message_id for channel_id, tracked_id in self.messages)
+
+    def untrack(self, message_id):
+        self.messages = [entry for entry in self.messages if entry[1] != message_id]
+        self.views.pop(message_id, None)
+
+# Interaction coordination: rapid clicks on one message only apply the newest selection
+class InteractionCoordinator:
+    """Orders highscores selections per message and cancels loads a newer selection has superseded"""
+    DEBOUNCE = 0.4  # Seconds a selection that needs a build waits for a newer one before starting it
+    MAX_MESSAGES = 256  # Messages tracked at once; the least recently clicked is forgotten first
+
+    def __init__(self):
+        self.messages = OrderedDict()  # Message id -> {'selection', 'load', 'lock'}
+        self.stats = {'selections': 0, 'superseded': 0}
+
+    def _state(self, message_id):
+        state = self.messages.get(message_id)
+        if state is None:
+            state = {'selection': 0, 'load': None, 'lock': asyncio.Lock()}
+            self.messages[message_id] = state
+            while len(self.messages) > self.MAX_MESSAGES:
+                self.messages.popitem(last=False)
+        self.messages.move_to_end(message_id)
+        return state
+
+    def select(self, message_id):
+        """Register a new selection on a message, cancelling the load of the one before it"""
+        state = self._state(message_id)
+        state['selection'] += 1
+        self.stats['selections'] += 1
+        load = state['load']
+        if load is not None and not load.done():
+            load.cancel()
+            self.stats['superseded'] += 1
+        state['load'] = None
+        return state['selection']
+
+    def is_current(self, message_id, selection):
+        state = self.messages.get(message_id)
+        return state is not None and state['selection'] == selection
+
+    def lock(self, message_id):
+        """Lock held around every edit of a message, so edits land in selection order"""
+        return self._state(message_id)['lock']
+
+    async def load(self, message_id, selection, coro):
+        """Run a selection's load after the debounce; returns (superseded, result)"""
+        if not self.is_current(message_id, selection):
+            coro.close()
+            return True, None
+        task = asyncio.create_task(self._debounced(coro))
+        self.messages[message_id]['load'] = task
+        try:
+            await asyncio.wait((task,))
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if task.cancelled():
+            return True, None
+        return False, task.result()
+
+    async def _debounced(self, coro):
+        try:
+            await asyncio.sleep(self.DEBOUNCE)
+        except asyncio.CancelledError:
+            # Superseded before the build started: nothing was fetched
+            coro.close()
+            raise
+        return await coro
+
 # Discord bot
 class HighscoresBot(discord.Client):
     def __init__(self, *args, **kwargs):
@@ -638,254 +1875,1093 @@ class HighscoresBot(discord.Client):
         self.tree = discord.app_commands.CommandTree(self)
 
         self.wom_client = WOMClient()
-        self.GROUP_ID = 2763  # Group ID for OSRS Defence clan
-        self.last_message = None
-        self.cached_embeds = {}
-        # Semaphore to limit concurrent API requests
-        self.api_semaphore = asyncio.Semaphore(5)  # Allow up to 5 concurrent API requests
-        # Cache for player validation results
-        self.player_validation_cache = {}
-        self.cache_times = {} # Added cache_times dictionary
+        self.highscores_views = {}  # (category, is_loading) -> prebuilt HighscoresView shared by every message
+        # Cache for player validation results (player key -> PLAYER_VALID / PLAYER_INVALID / PLAYER_UNKNOWN)
+        self.player_validation_cache = TTLCache("player_validation", max_entries=20000, default_ttl=self.CACHE_EXPIRY)
+        # Players whose validation came back unknown, waiting for the background re-check (name -> failed attempts)
+        self.revalidation_queue = OrderedDict()
+        self.revalidation_task = None
+        self.validation_changed_at = 0  # When a re-check last turned an unknown player valid or invalid
+        self.interactions = InteractionCoordinator()
+
+        # Settings per guild (guild id -> GuildConfig), and one data pipeline per WOM group
+        # (group id -> GroupPipeline) shared by every guild tracking that group
+        self.guild_configs = {}
+        self.pipelines = {}
+        self.pipelines_started = False
+        self.pipeline_guilds = {}  # group id -> guilds tracking it; a pipeline no guild tracks is closed
+        self.metrics_runner = None
+        self.register_metrics()
+
+    async def setup_hook(self):
+        # Route clicks on highscores messages from earlier runs to the prebuilt views
+        self.add_view(self.highscores_view("skills"))
+        self.add_view(self.highscores_view("bosses"))
+        # Names resolve to player ids from the start, so persisted id-keyed entries are hit right away
+        await self.wom_client.load_identities()
+        for config in await self.wom_client.cache_backend.load_guild_configs():
+            self.guild_configs[config.guild_id] = config
+            self.acquire_pipeline(config.group_id)
+        # Re-check players whose validation couldn't be decided, off the embed build path
+        self.revalidation_task = asyncio.create_task(self.revalidation_loop())
+        # Start a pipeline for the default group and every group a guild tracks
+        self.group_pipeline(DEFAULT_GROUP_ID)
+        self.pipelines_started = True
+        for pipeline in self.pipelines.values():
+            pipeline.start()
+        # Keep every posted highscores message up to date
+        if AUTO_REFRESH_INTERVAL > 0:
+            self.auto_refresh.start()
+        if METRICS_PORT > 0:
+            await self.start_metrics_server()
+
+    def register_metrics(self):
+        """Export the stats the bot already keeps, read at scrape time"""
+        wom_client = self.wom_client
+        METRICS.collector(
+            "wom_fetches_total", "counter", "WOM requests by outcome (started, coalesced into another, dropped while queued)",
+            lambda: [({'outcome': outcome}, count) for outcome, count in wom_client.request_stats.items()])
+        METRICS.collector(
+            "wom_scheduler_queued", "gauge", "WOM requests waiting for the scheduler by priority class",
+            lambda: [({'priority': priority}, queued) for priority, queued in enumerate(wom_client.scheduler.stats()['queued'])])
+        METRICS.collector(
+            "wom_scheduler_granted_total", "counter", "WOM requests let through by the scheduler by priority class",
+            lambda: [({'priority': priority}, granted) for priority, granted in enumerate(wom_client.scheduler.stats()['granted'])])
+        METRICS.collector(
+            "interaction_selections_total", "counter", "Highscores selections, and those superseded by a newer one",
+            lambda: [({'outcome': outcome}, count) for outcome, count in self.interactions.stats.items()])
+        METRICS.collector(
+            "validation_recheck_queue", "gauge", "Players waiting for a validation re-check",
+            lambda: [({}, len(self.revalidation_queue))])
+
+    async def start_metrics_server(self):
+        """Serve /metrics in the Prometheus text format and a health check on the bot's event loop"""
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/healthz', self.handle_health)
+        app.router.add_get('/', self.handle_health)
+        self.metrics_runner = web.AppRunner(app, access_log=None)
+        await self.metrics_runner.setup()
+        try:
+            await web.TCPSite(self.metrics_runner, '0.0.0.0', METRICS_PORT).start()
+            print(f"Serving metrics on port {METRICS_PORT}")
+        except OSError as e:
+            print(f"Could not start metrics server on port {METRICS_PORT}: {str(e)}")
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+
+    async def handle_metrics(self, request):
+        return web.Response(text=METRICS.render(), content_type='text/plain', charset='utf-8',
+                            headers={'Cache-Control': 'no-store'})
+
+    async def handle_health(self, request):
+        # Healthy while the client is running; the gateway connecting is reported but not required
+        if self.is_closed():
+            return web.Response(status=503, text="closed")
+        return web.Response(text="ok" if self.is_ready() else "starting")
+
+    def group_pipeline(self, group_id):
+        """The data pipeline for a WOM group, created on first use"""
+        pipeline = self.pipelines.get(group_id)
+        if pipeline is None:
+            pipeline = GroupPipeline(self, group_id)
+            self.pipelines[group_id] = pipeline
+            # Pipelines created before setup_hook are started there
+            if self.pipelines_started:
+                pipeline.start()
+        return pipeline
+
+    def acquire_pipeline(self, group_id):
+        """Count one more guild tracking a group, returning the group's pipeline"""
+        self.pipeline_guilds[group_id] = self.pipeline_guilds.get(group_id, 0) + 1
+        return self.group_pipeline(group_id)
+
+    def release_pipeline(self, group_id):
+        """Count one guild fewer tracking a group, closing its pipeline once none do"""
+        count = self.pipeline_guilds.get(group_id, 0) - 1
+        if count > 0:
+            self.pipeline_guilds[group_id] = count
+            return
+        self.pipeline_guilds.pop(group_id, None)
+        # The default group also serves DMs and guilds that haven't picked a group, so it stays up
+        if group_id == DEFAULT_GROUP_ID:
+            return
+        pipeline = self.pipelines.pop(group_id, None)
+        if pipeline is not None:
+            pipeline.close()
+            print(f"Closed the pipeline for group {group_id}, no guild tracks it anymore")
+
+    def guild_config(self, guild_id):
+        """Settings for a guild (None for DMs); guilds that haven't picked a group track DEFAULT_GROUP_ID"""
+        config = self.guild_configs.get(guild_id)
+        if config is None:
+            config = GuildConfig(guild_id, DEFAULT_GROUP_ID)
+            if guild_id is not None:
+                self.guild_configs[guild_id] = config
+                self.acquire_pipeline(DEFAULT_GROUP_ID)
+        return config
+
+    def pipeline_for(self, guild_id):
+        """The data pipeline of the group a guild tracks"""
+        return self.group_pipeline(self.guild_config(guild_id).group_id)
+
+    async def set_guild_group(self, guild_id, group_id):
+        """Point a guild at another WOM group"""
+        config = self.guild_config(guild_id)
+        previous_group_id = config.group_id
+        config.group_id = group_id
+        # Messages posted for the old group aren't refreshed with the new group's data
+        config.messages = []
+        config.views = {}
+        if group_id != previous_group_id:
+            self.acquire_pipeline(group_id)
+            self.release_pipeline(previous_group_id)
+        await self.wom_client.cache_backend.save_guild_config(config)
+
+    async def track_message(self, guild_id, message, view_type="total", category="skills"):
+        """Remember a highscores message a guild posted, so later commands and auto-refresh can find it"""
+        config = self.guild_config(guild_id)
+        config.track(message)
+        config.views[message.id] = self.message_view(guild_id, view_type, category)
+        if guild_id is not None:
+            await self.wom_client.cache_backend.save_guild_config(config)
+
+    def message_view(self, guild_id, view_type, category):
+        # What a message showing a view type shows: the data generation of the guild's cached embed
+        rendered = self.pipeline_for(guild_id).cached_embeds.peek(view_type)
+        return (view_type, category, rendered.generation if rendered is not None else None)
+
+    async def note_message_view(self, guild_id, message_id, view_type, category):
+        """Record what a tracked message now shows, persisted so auto-refresh keeps it after a restart"""
+        config = self.guild_config(guild_id)
+        if not config.is_tracked(message_id):
+            return
+        shown = self.message_view(guild_id, view_type, category)
+        if config.views.get(message_id) != shown:
+            config.views[message_id] = shown
+            await self.wom_client.cache_backend.save_guild_config(config)
+
+    @tasks.loop(seconds=AUTO_REFRESH_INTERVAL)
+    async def auto_refresh(self):
+        """Edit every tracked message whose view's data changed since it was last edited"""
+        # Rebuilds for auto-refresh give way to anything a user is waiting on
+        wom_priority.set(PRIORITY_BULK)
+        edited = unchanged = 0
+        for guild_id, config in list(self.guild_configs.items()):
+            pipeline = self.group_pipeline(config.group_id)
+            for channel_id, message_id in list(config.messages):
+                try:
+                    changed = await self.refresh_message(config, pipeline, channel_id, message_id)
+                except Exception as e:
+                    # An exception would end the loop, so it's logged per message instead
+                    print(f"Error auto-refreshing message {message_id}: {str(e)}")
+                    continue
+                if changed:
+                    edited += 1
+                else:
+                    unchanged += 1
+        if edited:
+            print(f"Auto-refresh edited {edited} message(s), {unchanged} unchanged")
+
+    async def refresh_message(self, config, pipeline, channel_id, message_id):
+        """Re-render a tracked message's view and edit it if the data changed; returns whether it was edited"""
+        # Messages whose view was never recorded (tracked before views were persisted) show the default one
+        view_type, category, _ = config.views.get(message_id, ("total", "skills", None))
+        # Only work shows up in /profile: a rebuild traces itself, and an edit is traced below
+        rendered = await pipeline.current_render(view_type)
+        if rendered is None:
+            return False
+        # Clicks edit the same messages, so edits go through the message's lock
+        async with self.interactions.lock(message_id):
+            shown = config.views.get(message_id, (view_type, category, None))
+            if shown[0] != view_type:
+                return False  # Someone switched views meanwhile; the next pass renders the new one
+            posted = shown[2]
+            if posted == rendered.generation:
+                return False
+            message = self.get_partial_messageable(channel_id).get_partial_message(message_id)
+            try:
+                with traced(f"refresh {view_type} (group {pipeline.group_id})"), trace_span("publish"):
+                    await message.edit(embed=rendered.embed, view=self.highscores_view(category))
+            except discord.NotFound:
+                # Deleted: stop refreshing it
+                config.untrack(message_id)
+                await self.wom_client.cache_backend.save_guild_config(config)
+                return False
+            config.views[message_id] = (view_type, category, rendered.generation)
+            await self.wom_client.cache_backend.save_guild_config(config)
+            return True
+
+    @auto_refresh.before_loop
+    async def before_auto_refresh(self):
+        await self.wait_until_ready()
+
+    async def get_last_message(self, guild_id):
+        """The highscores message a guild posted last, or None if there isn't one (any more)"""
+        config = self.guild_config(guild_id)
+        if not config.messages:
+            return None
+        channel_id, message_id = config.messages[-1]
+        message = discord.utils.get(self.cached_messages, id=message_id)
+        if message is not None:
+            return message
+        # Posted before a restart (or evicted from the message cache)
+        try:
+            channel = self.get_channel(channel_id) or await self.fetch_channel(channel_id)
+            return await channel.fetch_message(message_id)
+        except discord.HTTPException as e:
+            print(f"Could not fetch highscores message {message_id}: {str(e)}")
+            return None
 
     async def on_ready(self):
         print(f'{self.user} has connected to Discord!')
 
-    # Cache for player validation results (name ->> [is_valid, timestamp])
-    player_validation_cache = {}
+    async def close(self):
+        self.auto_refresh.cancel()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+        for pipeline in self.pipelines.values():
+            pipeline.close()
+        # Release the pooled WOM connections before the gateway shuts down
+        await self.wom_client.close()
+        await super().close()
+
     # Cache expiry time in seconds (6 hours)
     CACHE_EXPIRY = 6 * 60 * 60
+    # Unknown validation results are cached this long, so repeat failures don't cost retries (30 minutes)
+    UNKNOWN_VALIDATION_TTL = 30 * 60
+    # How often the background worker re-checks unknown players, and how many tries each gets (5 minutes)
+    REVALIDATION_INTERVAL = 5 * 60
+    REVALIDATION_MAX_ATTEMPTS = 5
+    # These are the skills we're checking (must be 2 or less)
+    RESTRICTED_SKILLS = ['attack', 'strength', 'magic', 'ranged']
 
     async def is_valid_player(self, player_name):
+        """Whether a player is shown on the highscores (unknown players are included until re-checked)"""
+        return await self.validate_player(player_name) != PLAYER_INVALID
+
+    async def validate_player(self, player_name):
+        """Validate a player against the combat skill rule: PLAYER_VALID, PLAYER_INVALID or PLAYER_UNKNOWN"""
         try:
             # Set this to True to see very detailed debug information
             DEBUG = False # Reduced debug output
-            current_time = time.time()
 
-            # Check cache first to avoid redundant API calls
-            if player_name in self.player_validation_cache:
-                cache_entry = self.player_validation_cache[player_name]
-                # If cache is still valid (within expiry time)
-                if current_time - cache_entry[1] < self.CACHE_EXPIRY:
-                    if DEBUG:
-                        print(f"Player {player_name}: Using cached validation result")
-                    return cache_entry[0]  # Return cached validation result
+            # Every name and alias of a player resolves to the same key (their WOM id once seen)
+            player_key = self.wom_client.identities.key(player_name)
+
+            # Check cache first to avoid redundant API calls; cached unknowns are left to the background re-check
+            cached_result = self.player_validation_cache.get(player_key)
+            if cached_result is not None:
+                if DEBUG:
+                    print(f"Player {player_name}: Using cached validation result ({cached_result})")
+                return cached_result
 
             if DEBUG:
                 print(f"Validating player: {player_name}")
 
-            # Try to get player details with a retry mechanism
-            retry_count = 0
-            max_retries = 4  # Increased max retries
-            player_details = None
-            session = requests.Session()  # Use a session for better performance
-            session.headers.update({'User-Agent': 'Discord Highscores Bot (https://github.com/yourusername/yourrepo)'}) # Added User-Agent
+            # Player snapshots come through the shared WOM client so validation reuses its
+            # pooled connection, 24h response cache and retry policy
+            player_details = await self.wom_client.get_player_details(player_name)
+            state = self._validation_state(player_details)
 
-            while retry_count < max_retries and player_details is None:
-                try:
-                    # Directly request player stats from the API
-                    url = f"https://api.wiseoldman.net/v2/players/{player_name}"
-                    response = session.get(url, timeout=15)  # Increased timeout slightly
-
-                    if response.status_code == 200:
-                        player_details = response.json()
-                    elif response.status_code == 429:
-                        # Rate limited - implement exponential backoff
-                        wait_time = 1.0 * (2 ** retry_count)  # 1, 2, 4, 8 seconds
-                        print(f"API returned status code 429 for player {player_name}, waiting {wait_time}s before retry")
-                        retry_count += 1
-                        await asyncio.sleep(wait_time)
+            if DEBUG:
+                print(f"Player {player_name}: {state}")
+
+        except Exception as e:
+            print(f"Error validating player {player_name}: {str(e)}")
+            state = PLAYER_UNKNOWN
+
+        self._cache_validation(player_name, state)
+        return state
+
+    def _validation_state(self, player_details):
+        # No snapshot (fetch failed after retries) or one missing combat skills can't be judged yet
+        if not player_details:
+            return PLAYER_UNKNOWN
+        is_valid = check_combat_skills(player_details, self.RESTRICTED_SKILLS)
+        if is_valid is None:
+            return PLAYER_UNKNOWN
+        return PLAYER_VALID if is_valid else PLAYER_INVALID
+
+    def _cache_validation(self, player_name, state):
+        player_key = self.wom_client.identities.key(player_name)
+        if state == PLAYER_UNKNOWN:
+            # Kept briefly so builds stop retrying the player, and queued for the background re-check
+            self.player_validation_cache.set(player_key, state, ttl=self.UNKNOWN_VALIDATION_TTL)
+            self.revalidation_queue.setdefault(player_name, 0)
+        else:
+            self.player_validation_cache.set(player_key, state)
+            self.revalidation_queue.pop(player_name, None)
+
+    async def revalidate_unknown_players(self):
+        """Re-check every queued unknown player with a fresh snapshot"""
+        changed = 0
+        for player_name in list(self.revalidation_queue):
+            try:
+                player_details = await self.wom_client.get_player_details(player_name, force=True)
+                state = self._validation_state(player_details)
+            except Exception as e:
+                print(f"Error re-validating player {player_name}: {str(e)}")
+                state = PLAYER_UNKNOWN
+
+            if state != PLAYER_UNKNOWN:
+                print(f"Player {player_name} re-validated: {state}")
+                self._cache_validation(player_name, state)
+                self.validation_changed_at = time.time()
+                changed += 1
+                continue
+
+            attempts = self.revalidation_queue.get(player_name, 0) + 1
+            if attempts >= self.REVALIDATION_MAX_ATTEMPTS:
+                # Give up until a build looks the player up again after the unknown entry expires
+                print(f"Player {player_name} still unknown after {attempts} re-checks, giving up for now")
+                self.revalidation_queue.pop(player_name, None)
+            else:
+                self.revalidation_queue[player_name] = attempts
+                self.player_validation_cache.set(self.wom_client.identities.key(player_name), PLAYER_UNKNOWN, ttl=self.UNKNOWN_VALIDATION_TTL)
+        return changed
+
+    async def revalidation_loop(self):
+        wom_priority.set(PRIORITY_BULK)
+        wom_request_owner.set("revalidation")
+        while not self.is_closed():
+            await asyncio.sleep(self.REVALIDATION_INTERVAL)
+            if not self.revalidation_queue:
+                continue
+            try:
+                await self.revalidate_unknown_players()
+            except Exception as e:
+                print(f"Error in revalidation loop: {str(e)}")
+
+    def validation_stats(self, pipeline):
+        """Counts of cached validation results by state and of a group's index, plus the re-check backlog"""
+        counts = {PLAYER_VALID: 0, PLAYER_INVALID: 0, PLAYER_UNKNOWN: 0}
+        for player_name, state in self.player_validation_cache.items():
+            if state in counts:
+                counts[state] += 1
+        index_valid = sum(1 for is_valid in pipeline.validation_index.values() if is_valid)
+        return {
+            'cached': counts,
+            'index': {PLAYER_VALID: index_valid, PLAYER_INVALID: len(pipeline.validation_index) - index_valid},
+            'pending_recheck': len(self.revalidation_queue),
+            'cache': self.player_validation_cache.stats(),
+        }
+
+    def highscores_view(self, category="skills", is_loading=False):
+        """Return the shared HighscoresView for a category and loading state, building it on first use"""
+        view = self.highscores_views.get((category, is_loading))
+        if view is None:
+            view = HighscoresView(self, active_category=category, is_loading=is_loading)
+            self.highscores_views[(category, is_loading)] = view
+        return view
+
+    def record_ack(self, interaction, path):
+        # Measured from the interaction's creation, which is what Discord's 3 second deadline counts from
+        INTERACTION_ACK_SECONDS.observe((discord.utils.utcnow() - interaction.created_at).total_seconds(), path)
+
+    async def show_highscores(self, interaction, category, view_type, label):
+        """Answer a button or dropdown click by switching its message to a view type.
+
+        A cached embed costs a single edit that also acknowledges the click; otherwise the
+        loading state is shown while acknowledging and the built embed replaces it. When
+        clicks on the same message overlap, only the newest selection is applied.
+        """
+        message_id = interaction.message.id
+        selection = self.interactions.select(message_id)
+        # Each guild sees the group it tracks
+        pipeline = self.pipeline_for(interaction.guild_id)
+        try:
+            lock = self.interactions.lock(message_id)
+            deferred = lock.locked()
+            if deferred:
+                # Another edit of this message is in flight and may take a while: acknowledge now so
+                # the click can't miss Discord's 3 second deadline, and edit the response once it's done
+                await interaction.response.defer()
+                self.record_ack(interaction, "deferred")
+            async with lock:
+                if not self.interactions.is_current(message_id, selection):
+                    # A newer selection arrived while we waited: acknowledge without touching the message
+                    if not deferred:
+                        await interaction.response.defer()
+                        self.record_ack(interaction, "superseded")
+                    return
+                embed = pipeline.peek_embed(view_type)
+                if embed is not None:
+                    if deferred:
+                        await interaction.edit_original_response(embed=embed, view=self.highscores_view(category))
                     else:
-                        print(f"API returned status code {response.status_code} for player {player_name}")
-                        retry_count += 1
-                        await asyncio.sleep(1.0)  # Increased wait time for better rate limit handling
-                except Exception as e:
-                    print(f"Request error for player {player_name}: {str(e)}")
-                    retry_count += 1
-                    await asyncio.sleep(1.0)  # Increased wait time
+                        await interaction.response.edit_message(embed=embed, view=self.highscores_view(category))
+                        self.record_ack(interaction, "cached")
+                    await self.note_message_view(interaction.guild_id, message_id, view_type, category)
+                    return
+                if deferred:
+                    await interaction.edit_original_response(view=self.highscores_view(category, is_loading=True))
+                else:
+                    await interaction.response.edit_message(view=self.highscores_view(category, is_loading=True))
+                    self.record_ack(interaction, "loading")
 
-            # If we still couldn't get player details after retries, include them for now
-            # This is temporary to avoid filtering out too many players due to API issues
-            if not player_details:
-                if DEBUG:
-                    print(f"Player {player_name}: Could not fetch details after {max_retries} retries, INCLUDING TEMPORARILY")
-                # Cache the result
-                self.player_validation_cache[player_name] = [True, current_time]
-                return True  # Include player if we can't fetch their details
-
-            # Fast path check for required fields
-            if (not player_details or 
-                'latestSnapshot' not in player_details or 
-                not player_details['latestSnapshot'] or 
-                'data' not in player_details['latestSnapshot'] or 
-                'skills' not in player_details['latestSnapshot']['data']):
+            # Everything from here on, including the build it waits for, is traced for /profile
+            with traced(f"click {view_type} (group {pipeline.group_id})") as trace:
+                trace.outcome = await self._show_built(interaction, pipeline, selection, category, view_type, label)
+        except discord_errors.NotFound:
+            print(f"Interaction expired for {view_type}")
+        except Exception as e:
+            print(f"Error showing {view_type} highscores: {str(e)}")
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
+                else:
+                    await interaction.followup.send(f"❌ An error occurred: {str(e)}", ephemeral=True)
+            except:
+                print("Could not update error message")
 
-                if DEBUG:
-                    print(f"Player {player_name}: Missing required data fields, INCLUDING TEMPORARILY")
-                # Cache the result
-                self.player_validation_cache[player_name] = [True, current_time]
-                return True
+    async def _show_built(self, interaction, pipeline, selection, category, view_type, label):
+        # Slow path of show_highscores: wait for the build, then apply it unless superseded
+        message_id = interaction.message.id
+        try:
+            superseded, embed = await self.interactions.load(message_id, selection, pipeline.get_embed(view_type))
+            if superseded:
+                print(f"Selection of {view_type} superseded by a newer one")
+                return "superseded"
+            if not isinstance(embed, discord.Embed):
+                raise Exception(embed)
+        except Exception as e:
+            print(f"Error getting embed for {view_type}: {str(e)}")
+            async with self.interactions.lock(message_id):
+                if self.interactions.is_current(message_id, selection):
+                    # Put the controls back before reporting the error
+                    await interaction.edit_original_response(view=self.highscores_view(category))
+            await interaction.followup.send(f"❌ Error loading {label} highscores: {str(e)}", ephemeral=True)
+            return "error"
+
+        async with self.interactions.lock(message_id):
+            if not self.interactions.is_current(message_id, selection):
+                print(f"Selection of {view_type} superseded by a newer one")
+                return "superseded"
+            with trace_span("publish"):
+                try:
+                    await interaction.edit_original_response(embed=embed, view=self.highscores_view(category))
+                    await self.note_message_view(interaction.guild_id, message_id, view_type, category)
+                except discord.errors.HTTPException as e:
+                    print(f"Error editing message: {str(e)}")
+                    # If edit fails, send a new message instead
+                    new_message = await interaction.channel.send(embed=embed, view=self.highscores_view(category))
+                    await self.track_message(interaction.guild_id, new_message, view_type, category)
+        return "ok"
 
-            skills = player_details['latestSnapshot']['data']['skills']
+    async def on_message(self, message):
+        if message.author == self.user:
+            return
 
-            if DEBUG:
-                print(f"Player {player_name} skills data retrieved successfully")
-
-            # These are the skills we're checking (must be 2 or less)
-            restricted_skills = ['attack', 'strength', 'magic', 'ranged']
-
-            # Check each restricted skill strictly - optimized lookup
-            for skill_name in restricted_skills:
-                # Skip if the skill is missing or incomplete
-                if skill_name not in skills or 'level' not in skills[skill_name]:
-                    if DEBUG:
-                        print(f"Player {player_name}: {skill_name.capitalize()} data incomplete, INCLUDING TEMPORARILY")
-                    self.player_validation_cache[player_name] = [True, current_time]
-                    return True
-
-                # If level is more than 2, exclude the player
-                if skills[skill_name]['level'] > 2:
-                    if DEBUG:
-                        print(f"Player {player_name} EXCLUDED: {skill_name.capitalize()} level {skills[skill_name]['level']} > 2")
-                    # Cache the negative result
-                    self.player_validation_cache[player_name] = [False, current_time]
-                    return False
-
-            # All checks passed, player meets requirements
-            if DEBUG:
-                print(f"Player {player_name} VALIDATED - meets requirements (≤ 2 in Attack/Strength/Magic/Ranged)")
-            # Cache the positive result
-            self.player_validation_cache[player_name] = [True, current_time]
-            return True
+        # Commands act on the group this guild tracks
+        guild_id = message.guild.id if message.guild else None
+        pipeline = self.pipeline_for(guild_id)
 
-        except Exception as e:
-            print(f"Error validating player {player_name}: {str(e)}")
-            # If there's an error, include them temporarily to avoid filtering out too many players
-            print(f"Player {player_name}: Error during validation, INCLUDING TEMPORARILY")
-            # Don't cache errors to allow retry
-            return True
+        if message.content.lower() == '/clanhighscores':
+            # For /clanhighscores, we just display the highscores with latest data
+            processing_msg = await message.channel.send("Fetching highscores... Please wait a moment.")
+            print(f"DEBUG: Received command: {message.content}")
 
-    async def create_total_level_embed(self, group_name):
-        # Get overall hiscores for total level ranking
-        overall_hiscores = await self.wom_client.get_group_hiscores(self.GROUP_ID, metric='overall')
-        if not overall_hiscores:
-            return None
+            embed_or_error = await pipeline.update_highscores(message)
 
-        # Prepare highscores embed
-        embed = discord.Embed(
-            title=f"{group_name} Highscores - Total Level",
-            description=f"Top players in {group_name} by total level (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
-            color=0x3498db,
-            timestamp=datetime.now()
-        )
+            if isinstance(embed_or_error, str):
+                print(f"DEBUG: Error returned: {embed_or_error}")
+                await message.channel.send(f"⚠️ {embed_or_error}")
+            else:
+                print("DEBUG: Successfully created embed, sending to channel")
+                # Create view with buttons and pass cached embeds - default to skills view
+                view = self.highscores_view("skills")
 
-        # Process all players to get total levels and experience
-        processed_players = []
-        valid_player_count = 0
-        excluded_count = 0
-        rate_limited_count = 0
+                # Send a new message with the highscores and buttons
+                new_message = await message.channel.send(embed=embed_or_error, view=view)
+                await self.track_message(guild_id, new_message)
+
+                # Delete the processing message after sending the embed
+                try:
+                    await processing_msg.delete()
+                except:
+                    pass
+
+                print("DEBUG: Message sent successfully")
+
+        elif message.content.lower() == '!refresh':
+            # For !refresh, we update the last sent message if itexists:
+            last_message = await self.get_last_message(guild_id)
+            if last_message is None:
+                await message.channel.send("No highscores message to refresh. Please use `/clanhighscores` first.")
+                return
+
+            processing_msg = await message.channel.send("Refreshing highscores... Please wait a moment.")
+            print(f"DEBUG: Received refresh command")
+
+            # Force refresh the cache
+            embed_or_error = await pipeline.update_highscores(message, force_refresh=True)
+
+            if isinstance(embed_or_error, str):
+                print(f"DEBUG: Error returned: {embed_or_error}")
+                await message.channel.send(f"⚠️ {embed_or_error}")
+            else:
+                print("DEBUG: Successfully created embed, updating last message")
+                try:
+                    # Create view with buttons - preserve the active category if we can detect it from current view
+                    active_category = "skills"  # Default
+
+                    # Try to determine the current active category from the message
+                    if hasattr(last_message, "components") and last_message.components:
+                        for row in last_message.components:
+                            for component in row.children:
+                                if isinstance(component, discord.ui.Button):
+                                    if component.custom_id == "skills_button" and component.style == discord.ButtonStyle.primary:
+                                        active_category = "skills"
+                                        break
+                                    elif component.custom_id == "bosses_button" and component.style == discord.ButtonStyle.primary:
+                                        active_category = "bosses"
+                                        break
 
-        # Use a bounded semaphore to limit concurrent API calls
-        # and process players in batches to avoid overwhelming the API
+                    view = self.highscores_view(active_category)
 
-        print(f"Processing up to 30 players for total level highscores")
+                    # Edit the last message instead of sending a new one
+                    await last_message.edit(embed=embed_or_error, view=view)
+                    await self.note_message_view(guild_id, last_message.id, "total", active_category)
+                    await message.add_reaction("✅")  # Add a checkmark reaction to indicate success
+                except Exception as e:
+                    print(f"DEBUG: Error updating message: {str(e)}")
+                    await message.channel.send("Error updating the message. Sending a new one instead.")
 
-        # Process players in batches to validate them
-        batch_size = 5  # Reduced batch size to avoid rate limits
-        # Process up to 30 players to get at least 20 valid ones
-        max_players_to_check = min(30, len(overall_hiscores))
-        batches = [overall_hiscores[i:i+batch_size] for i in range(0, max_players_to_check, batch_size)]
+                    # Create view with buttons
+                    view = self.highscores_view("skills")
+                    new_message = await message.channel.send(embed=embed_or_error, view=view)
+                    await self.track_message(guild_id, new_message)
 
-        # Track how many players we've fully processed
-        players_processed = 0
+                # Delete the processing message after updating
+                try:
+                    await processing_msg.delete()
+                except:
+                    pass
 
-        for batch_index, batch in enumerate(batches):
-            # Create tasks for validating all players in the batch concurrently
-            validation_tasks = []
-            for entry in batch:
-                player_name = entry['player']['displayName']
-                validation_tasks.append((player_name, entry, asyncio.create_task(self.is_valid_player(player_name))))
+                print("DEBUG: Message refreshed successfully")
 
-            # Process results as they complete
-            for player_name, entry, validation_task in validation_tasks:
+        elif message.content.lower() == '/cacherefresh' or message.content.lower() == '/refreshcache':
+            # Refresh cache and create new embed
+            processing_msg = await message.channel.send("Refreshing highscores cache and creating a new embed...")
+            print(f"DEBUG: Received cacherefresh command")
+
+            # Force refresh the cache, then refresh the other cached views in the background
+            embed_or_error = await pipeline.update_highscores(message, force_refresh=True)
+            pipeline.refresh_cached_embeds()
+
+            if isinstance(embed_or_error, str):
+                print(f"DEBUG: Error returned: {embed_or_error}")
+                await message.channel.send(f"⚠️ {embed_or_error}")
+            else:
+                # Create view with buttons
+                view = self.highscores_view("skills")
+
+                # Send a new message with refreshed data
+                new_message = await message.channel.send(embed=embed_or_error, view=view)
+                await self.track_message(guild_id, new_message)
+
+                # Delete the processing message
                 try:
-                    players_processed += 1
-                    is_valid = await validation_task
+                    await processing_msg.delete()
+                except:
+                    pass
 
-                    if not is_valid:
-                        print(f"FILTERED OUT: {player_name} - over combat skill limit or missing data")
-                        excluded_count += 1
-                        continue  # Skip this player
+                print("DEBUG: Cache refreshed and new embed created successfully")
+
+        elif message.content.lower() == '!validation':
+            # Show what the validation cache currently knows
+            stats = self.validation_stats(pipeline)
+            cached = stats['cached']
+            await message.channel.send(
+                f"Validation cache: {cached[PLAYER_VALID]} valid, {cached[PLAYER_INVALID]} invalid, "
+                f"{cached[PLAYER_UNKNOWN]} unknown ({stats['pending_recheck']} queued for re-check)\n"
+                f"Validation index: {stats['index'][PLAYER_VALID]} valid, {stats['index'][PLAYER_INVALID]} invalid"
+            )
 
-                    valid_player_count += 1
+        elif message.content.lower() == '/new':
+            # Create a new embed without refreshing cache
+            processing_msg = await message.channel.send("Creating a new highscores embed without refreshing cache...")
+            print(f"DEBUG: Received new embed command")
 
-                    # Use the level field directly from the API for total level
-                    total_level = 0
-                    total_exp = 0
+            # Get embed from cache or create a new one without refreshing
+            embed = await pipeline.update_highscores(message, force_refresh=False)
 
-                    # Get total level and exp from the API
-                    if 'data' in entry:
-                        if 'level' in entry['data']:
-                            total_level = entry['data']['level']
-                        if 'experience' in entry['data']:
-                            total_exp = entry['data']['experience']
+            if isinstance(embed, str):
+                print(f"DEBUG: Error returned: {embed}")
+                await message.channel.send(f"⚠️ {embed}")
+            else:
+                # Create view with buttons
+                view = self.highscores_view("skills")
 
-                    # Fallback if we couldn't find it in the expected location
-                    if total_level == 0 and 'player' in entry and 'exp' in entry['player']:
-                        total_exp = entry['player']['exp']
+                # Send a new message
+                new_message = await message.channel.send(embed=embed, view=view)
+                await self.track_message(guild_id, new_message)
 
-                    processed_players.append({
-                        'name': player_name,
-                        'total_level': total_level,
-                        'total_exp': total_exp
-                    })
+                # Delete the processing message
+                try:
+                    await processing_msg.delete()
+                except:
+                    pass
 
-                except Exception as e:
-                    if "429" in str(e):
-                        print(f"Rate limited while processing player {player_name}. Waiting before retrying.")
-                        rate_limited_count += 1
-                    else:
-                        print(f"Error processing player {player_name}: {str(e)}")
+                print("DEBUG: New embed created successfully without refreshing cache")
 
-            # Larger delay between batches to avoid rate limiting
-            # Exponential backoff based on batch index
-            delay = min(1.0 + (batch_index * 0.5), 5.0)  # Gradually increase delay up to 5 seconds
-            print(f"Waiting {delay:.1f}s before next batch to avoid rate limits...")
-            await asyncio.sleep(delay)
+        elif message.content.lower().startswith('!setgroup'):
+            # Point this server at another Wise Old Man group
+            if message.guild is None or not message.author.guild_permissions.manage_guild:
+                await message.channel.send("⚠️ Only server managers can change the tracked group.")
+                return
+            parts = message.content.split()
+            if len(parts) != 2 or not parts[1].isdigit():
+                await message.channel.send("Usage: `!setgroup <Wise Old Man group id>`")
+                return
+            group_id = int(parts[1])
+            group_info = await self.wom_client.get_group_details(group_id)
+            if not group_info:
+                await message.channel.send(f"⚠️ Could not find Wise Old Man group {group_id}.")
+                return
+            await self.set_guild_group(guild_id, group_id)
+            await message.channel.send(f"✅ This server now tracks {group_info.get('name', group_id)} (group {group_id}). Use `/clanhighscores` to post its highscores.")
 
-        print(f"Processed a total of {players_processed} players out of requested {max_players_to_check}")
+# Per-group data pipeline: leaderboards, rankings and embeds of one WOM group, shared by every guild tracking it
+class GroupPipeline:
+    """Builds and caches one WOM group's leaderboard embeds, keeping them warm in the background"""
+    def __init__(self, bot, group_id):
+        self.bot = bot
+        self.wom_client = bot.wom_client
+        self.group_id = group_id
+        # Embeds keyed by view type; fresh for EMBED_SOFT_TTL, then served stale until EMBED_HARD_TTL
+        self.cached_embeds = TTLCache(
+            f"embeds_{group_id}",
+            max_entries=200,
+            max_bytes=8 * 1024 * 1024,
+            default_ttl=self.EMBED_SOFT_TTL,
+            stale_ttl=self.EMBED_HARD_TTL - self.EMBED_SOFT_TTL,
+            sizeof=lambda rendered: len(json.dumps(rendered.to_dict(), default=str))
+        )
+        # Rendered payloads by (view type, data generation), so unchanged data is never rendered twice
+        self.rendered_embeds = TTLCache(
+            f"rendered_{group_id}",
+            max_entries=400,
+            max_bytes=8 * 1024 * 1024,
+            default_ttl=self.EMBED_HARD_TTL,
+            sizeof=lambda rendered: len(json.dumps(rendered.to_dict(), default=str))
+        )
+        self.cache_times = {} # Added cache_times dictionary
+        self.embed_builds = {}  # view type -> task rebuilding it, so rebuilds are deduplicated
+        self.embed_build_waiters = {}  # view type -> callers waiting on its build
+        self.detached_builds = set()  # Builds someone asked for in the background, which are never abandoned
+        # Per-metric qualifying rows (generation, rows) every view slices from, and the tasks computing them
+        self.ranked_cache = TTLCache(f"ranked_{group_id}", max_entries=200, default_ttl=self.EMBED_SOFT_TTL)
+        self.ranked_builds = {}
+        self.prewarm_task = None
+
+        # Bulk validation index built from the group's combat skill leaderboards
+        # (player key -> is_valid), so builders can filter candidates without per-player lookups
+        self.validation_index = {}
+        self.validation_index_built_at = 0
+        self.validation_index_build = None  # Task of the build currently running, if any
+        self.validation_index_task = None
+
+        # Leaderboards for every metric computed locally from member snapshots
+        self.leaderboard_engine = LeaderboardEngine(self.wom_client, group_id, bot.RESTRICTED_SKILLS)
+
+    def start(self):
+        """Start the background loops keeping this group's data warm"""
+        # Keep the combat-skill validation index fresh in the background
+        self.validation_index_task = asyncio.create_task(self.validation_index_loop())
+        # Build every leaderboard embed ahead of user clicks
+        if PREWARM_INTERVAL > 0:
+            self.prewarm_task = asyncio.create_task(self.prewarm_loop())
+
+    def close(self):
+        for task in (self.validation_index_task, self.prewarm_task):
+            if task is not None:
+                task.cancel()
+
+    def owner(self, name):
+        """Scheduler owner for this group's requests, so groups share each priority class fairly"""
+        return (self.group_id, name)
+
+    # Views offered by the Skills and Bosses dropdowns, in the order they are prewarmed
+    SKILL_VIEWS = [
+        'defence', 'hitpoints', 'prayer', 'slayer', 'cooking', 'woodcutting', 'fletching',
+        'fishing', 'firemaking', 'crafting', 'mining', 'smithing', 'herblore', 'agility',
+        'thieving', 'farming', 'runecrafting', 'hunter', 'construction'
+    ]
+    BOSS_VIEWS = [
+        'bryophyta', 'callisto', 'chambers_of_xeric', 'chambers_of_xeric_challenge_mode',
+        'chaos_elemental', 'chaos_fanatic', 'commander_zilyana', 'corporeal_beast',
+        'crazy_archaeologist', 'deranged_archaeologist', 'giant_mole', 'kalphite_queen',
+        'king_black_dragon', 'kril_tsutsaroth', 'obor', 'sarachnis', 'scorpia', 'scurrius',
+        'tempoross', 'the_hueycoatl', 'the_royal_titans', 'venenatis', 'vetion', 'wintertodt'
+    ]
+    # How many embeds a prewarm pass builds at once
+    PREWARM_CONCURRENCY = 3
+
+    def view_metrics(self, view_type):
+        """Leaderboard metrics a view type is built from"""
+        if view_type == "total":
+            return {"overall"}
+        if view_type == "bosses_overview":
+            return set(self.BOSS_VIEWS)
+        return {view_type}
+
+    async def prewarm_embeds(self, max_age=None):
+        """Build every dropdown view into the embed cache, skipping ones built within max_age"""
+        started = time.time()
+        # Load the validation index and compute every leaderboard once up front so the builds below share them
+        await self.ensure_validation_index()
+        previous = self.leaderboard_engine.result
+        result = await self.refresh_leaderboards()
+
+        if previous is not None and (result is None or result is previous):
+            # The refresh failed, so nothing could be checked: the cached embeds keep aging (and their
+            # "Last updated" time) until a later pass or a stale-while-revalidate rebuild gets new data
+            print("Leaderboard refresh failed, leaving the cached embeds as they are")
+            return
 
-        # Print the actual number of players we processed vs filtered
-        print(f"Processed {len(processed_players)} valid players from {max_players_to_check} total checked")
+        # After an incremental refresh only views over changed leaderboards need rebuilding
+        unchanged_since = None
+        changed_metrics = set()
+        if previous is not None and self.leaderboard_engine.changed_metrics is not None:
+            unchanged_since = previous.built_at
+            changed_metrics = self.leaderboard_engine.changed_metrics
+
+        # The overview goes last so it reuses the boss hiscores the single views just fetched
+        view_types = ["total"] + self.SKILL_VIEWS + self.BOSS_VIEWS + ["bosses_overview"]
+        semaphore = asyncio.Semaphore(self.PREWARM_CONCURRENCY)
+        built = 0
+
+        async def warm(view_type):
+            nonlocal built
+            built_at = self.cache_times.get(view_type)
+            if max_age is not None and built_at and view_type in self.cached_embeds and started - built_at < max_age:
+                return  # Someone rebuilt it recently enough
+            if (unchanged_since is not None and built_at and built_at >= unchanged_since and
+                    built_at >= self.validation_generation() and
+                    view_type in self.cached_embeds and not (self.view_metrics(view_type) & changed_metrics)):
+                # Neither its leaderboards nor the validation results have changed since it was built,
+                # so mark the cached embed current without rebuilding
+                self.cached_embeds.set(view_type, self.cached_embeds[view_type].restamp())
+                self.cache_times[view_type] = time.time()
+                return
+            async with semaphore:
+                result = await self.rebuild_embed(view_type, max_age=max_age, priority=PRIORITY_BULK)
+            if isinstance(result, discord.Embed):
+                built += 1
+            else:
+                print(f"Prewarm failed for {view_type}: {result}")
+
+        await asyncio.gather(*[warm(view_type) for view_type in view_types[:-1]])
+        await warm(view_types[-1])
+        print(f"Prewarmed {built}/{len(view_types)} embeds in {time.time() - started:.1f}s")
+
+    async def prewarm_loop(self):
+        # The first pass accepts any unexpired (e.g. persisted) API data so startup is quick;
+        # later passes refetch anything older than the interval
+        max_age = None
+        # Prewarm requests give way to anything a user is waiting on
+        wom_priority.set(PRIORITY_BULK)
+        while not self.bot.is_closed():
+            try:
+                await self.prewarm_embeds(max_age=max_age)
+            except Exception as e:
+                print(f"Error in prewarm loop: {str(e)}")
+            max_age = PREWARM_INTERVAL
+            await asyncio.sleep(PREWARM_INTERVAL)
+
+    # How often the bulk validation index is rebuilt from the group hiscores (6 hours)
+    VALIDATION_INDEX_INTERVAL = 6 * 60 * 60
+
+    async def build_validation_index(self):
+        """Build the validation index from the attack/strength/magic/ranged group hiscores"""
+        wom_request_owner.set(self.owner("validation_index"))
+        force = self.validation_index_built_at > 0  # Scheduled rebuilds must not reuse stale pages
+        leaderboards = await asyncio.gather(*[
+            self.wom_client.get_all_group_hiscores(self.group_id, metric=skill, force=force)
+            for skill in self.bot.RESTRICTED_SKILLS
+        ])
+
+        if any(rows is None for rows in leaderboards):
+            print("Could not fetch all combat skill hiscores, keeping the previous validation index")
+            return self.validation_index
+
+        # Count in how many of the restricted leaderboards each player was seen, and flag anyone over level 2
+        # (keyed by player id through the identity index, so every alias finds the entry)
+        seen_counts = {}
+        over_limit = set()
+        for rows in leaderboards:
+            for entry in rows:
+                key = self.wom_client.identities.key(entry['player'])
+                seen_counts[key] = seen_counts.get(key, 0) + 1
+                if entry.get('data', {}).get('level', 0) > 2:
+                    over_limit.add(key)
+
+        index = {}
+        for key, seen in seen_counts.items():
+            if key in over_limit:
+                index[key] = False
+            elif seen == len(self.bot.RESTRICTED_SKILLS):
+                index[key] = True
+            # Players missing from a leaderboard stay out of the index and fall back to a snapshot lookup
+
+        self.validation_index = index
+        self.validation_index_built_at = time.time()
+        print(f"Validation index built: {sum(index.values())} valid, {len(index) - sum(index.values())} excluded")
+        return index
+
+    async def refresh_leaderboards(self):
+        """Recompute every leaderboard from member snapshots and share its validation results"""
+        try:
+            result = await self.leaderboard_engine.refresh()
+        except Exception as e:
+            print(f"Error refreshing leaderboards: {str(e)}")
+            return None
+        if result is not None:
+            self.validation_index.update(result.validity)
+        return result
+
+    async def iter_leaderboard_rows(self, metric, max_rows=None):
+        """Stream ranked rows for a metric, from the local leaderboards if built, else the group hiscores"""
+        result = self.leaderboard_engine.result
+        if result is not None:
+            for entry in result.ranked_rows(metric, max_rows):
+                yield entry
+            return
+        async with aclosing(self.wom_client.iter_group_hiscores(self.group_id, metric=metric, max_rows=max_rows)) as rows:
+            async for entry in rows:
+                yield entry
+
+    async def ensure_validation_index(self):
+        """Make sure an index exists before filtering, sharing any build already in progress"""
+        if self.validation_index_built_at and time.time() - self.validation_index_built_at < self.VALIDATION_INDEX_INTERVAL:
+            return self.validation_index
+        if self.validation_index_build is None or self.validation_index_build.done():
+            self.validation_index_build = asyncio.create_task(self.build_validation_index())
+            self.validation_index_build.add_done_callback(lambda _: self.wom_client.scheduler.unboost(self.owner("validation_index")))
+        else:
+            # Joining a build started in the background: its requests move up to our class
+            self.wom_client.scheduler.boost(self.owner("validation_index"), wom_priority.get())
+        try:
+            with trace_span("validate"):
+                return await asyncio.shield(self.validation_index_build)
+        except Exception as e:
+            print(f"Error building validation index: {str(e)}")
+            return self.validation_index
 
-        # Sort players by total level and then by total exp (both descending)
-        processed_players.sort(key=lambda x: (-x['total_level'], -x['total_exp']))
+    async def validation_index_loop(self):
+        wom_priority.set(PRIORITY_BULK)
+        while not self.bot.is_closed():
+            try:
+                # The index is stale again by the time each sleep ends, so this rebuilds it
+                await self.ensure_validation_index()
+            except Exception as e:
+                print(f"Error in validation index loop: {str(e)}")
+            await asyncio.sleep(self.VALIDATION_INDEX_INTERVAL)
 
-        # Add the top 15 by Total Level
-        top_level_text = ""
-        if processed_players:
-            # Sort by total level first, then by total exp
-            level_sorted = sorted(processed_players, key=lambda x: (-x['total_level'], -x['total_exp']))
-            for i, player in enumerate(level_sorted[:15], 1):
-                top_level_text += f"{i}. {player['name']} | Lvl: {player['total_level']} | XP: {player['total_exp']:,}\n"
-        else:
-            top_level_text = "No players found meeting the criteria (≤ 2 in Attack/Strength/Magic/Ranged)"
-
-        # Add the top 15 by Total Experience
-        top_exp_text = ""
-        if processed_players:
-            # Sort purely by total exp
-            exp_sorted = sorted(processed_players, key=lambda x: -x['total_exp'])
-            for i, player in enumerate(exp_sorted[:15], 1):
-                top_exp_text += f"{i}. {player['name']} | Lvl: {player['total_level']} | XP: {player['total_exp']:,}\n"
+    async def is_valid_player(self, player_name):
+        """Whether a player is shown on the highscores, answered from this group's index when possible"""
+        # The bulk validation index answers most lookups without touching the API
+        indexed = self.validation_index.get(self.wom_client.identities.key(player_name))
+        if indexed is not None:
+            return indexed
+        with trace_span("validate"):
+            return await self.bot.is_valid_player(player_name)
+
+    # How many candidates the top-N selector validates ahead of the leaderboard position it has reached
+    SELECT_LOOKAHEAD = 10
+
+    async def select_top_players(self, rows, n=None, accept=None):
+        """First n leaderboard rows (all if n is None) whose player passes validation, in leaderboard order.
+
+        rows may be a list or an async iterator; accept is an optional cheap row filter applied
+        before validating. Candidates are validated concurrently, at most SELECT_LOOKAHEAD ahead
+        of the first undecided row, and nothing further is read once n rows qualify.
+        """
+        streaming = hasattr(rows, '__anext__')
+        if not streaming:
+            rows = iter(rows)
+
+        async def next_row():
+            try:
+                if streaming:
+                    return await rows.__anext__()
+                return next(rows)
+            except (StopIteration, StopAsyncIteration):
+                return None
+
+        async def validate(position, entry):
+            return position, await self.is_valid_player(entry['player']['displayName'])
+
+        selected = []
+        candidates = {}  # position -> row waiting for its validation result
+        decided = {}  # position -> validation result, until every earlier position is decided too
+        pending = set()
+        next_position = 0  # Next position handed out to a candidate
+        emit_position = 0  # First position not yet decided
+        exhausted = False
+        try:
+            while True:
+                # Keep the lookahead window full
+                while not exhausted and len(candidates) < self.SELECT_LOOKAHEAD:
+                    entry = await next_row()
+                    if entry is None:
+                        exhausted = True
+                        break
+                    if accept is not None and not accept(entry):
+                        continue
+                    candidates[next_position] = entry
+                    pending.add(asyncio.ensure_future(validate(next_position, entry)))
+                    next_position += 1
+
+                if not pending:
+                    return selected
+
+                # Wait for whichever validation finishes first, then collect every one that has
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    position, is_valid = task.result()
+                    decided[position] = is_valid
+
+                # Emit the decided prefix so the output keeps leaderboard order
+                while emit_position in decided:
+                    entry = candidates.pop(emit_position)
+                    if decided.pop(emit_position):
+                        selected.append(entry)
+                        if n is not None and len(selected) >= n:
+                            return selected
+                    emit_position += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            if streaming and hasattr(rows, 'aclose'):
+                await rows.aclose()
+
+    # Qualifying rows kept per metric: as many as the deepest view uses (total level ranks 30)
+    RANKED_DEPTH = 30
+    # Leaderboard rows scanned per metric while looking for them
+    RANKED_SCAN_ROWS = 60
+
+    def validation_generation(self):
+        """When the validation results rankings depend on last changed: an index rebuild or a re-check"""
+        return max(self.validation_index_built_at, self.bot.validation_changed_at)
+
+    def ranked_generation(self):
+        """Identifies the leaderboard data and validation results rankings were computed from"""
+        result = self.leaderboard_engine.result
+        return (result.built_at if result is not None else None, self.validation_generation())
+
+    async def get_ranked_players(self, metric, limit=None):
+        """Qualifying rows for a metric in leaderboard order, computed once and shared by every view.
+
+        Returns None if the leaderboard couldn't be read at all.
+        """
+        # Builds asking for fresher WOM data than the local leaderboards hold refresh them first;
+        # the refresh is shared with other builds and only refetches members whose stats changed
+        max_age = wom_max_age.get()
+        result = self.leaderboard_engine.result
+        if max_age is not None and result is not None and time.time() - result.built_at > max_age:
+            await self.refresh_leaderboards()
+
+        generation = self.ranked_generation()
+        cached = self.ranked_cache.get(metric)
+        # Builds asking for fresher WOM data than the ranking was made from recompute it
+        too_old = max_age is not None and cached is not None and time.time() - self.ranked_cache.stored_at(metric) > max_age
+        if cached is not None and cached[0] == generation and not too_old:
+            rows = cached[1]
         else:
-            top_exp_text = "No players found meeting the criteria (≤ 2 in Attack/Strength/Magic/Ranged)"
+            # Views built at the same time share one ranking of the metric
+            build_task = self.ranked_builds.get(metric)
+            if build_task is None or build_task.done():
+                build_task = asyncio.create_task(self._rank_metric(metric))
+                self.ranked_builds[metric] = build_task
+            with trace_span("rank"):
+                rows = await asyncio.shield(build_task)
+        if rows is None or limit is None:
+            return rows
+        return rows[:limit]
+
+    async def _rank_metric(self, metric):
+        # The only place builds wait for the validation index; the ranking is cached under the generation it used
+        await self.ensure_validation_index()
+        generation = self.ranked_generation()
+        rows_seen = 0
+
+        def accept(entry):
+            nonlocal rows_seen
+            rows_seen += 1
+            # Only players with XP in the skill (or kills for the boss) are ranked
+            data = entry.get('data', {})
+            return data.get('kills', data.get('experience', 0)) > 0
+
+        # The local leaderboards always answer; an empty one just means nobody has XP or kills in the metric
+        local = self.leaderboard_engine.result is not None
+        rows = await self.select_top_players(
+            self.iter_leaderboard_rows(metric, max_rows=self.RANKED_SCAN_ROWS),
+            n=self.RANKED_DEPTH,
+            accept=accept
+        )
+        if rows_seen == 0 and not local:
+            return None
+        self.ranked_cache.set(metric, (generation, rows))
+        return rows
+
+    async def create_total_level_embed(self, group_name):
+        # Qualifying players by overall experience, shared with every other view of the metric
+        valid_entries = await self.get_ranked_players('overall')
+        if not valid_entries:
+            return None
 
-        embed.add_field(name="Top 15 Players by Total Level", value=top_level_text, inline=False)
-        embed.add_field(name="Top 15 Players by Total Experience", value=top_exp_text, inline=False)
-        print(f"Filtering stats: {valid_player_count} players included, {excluded_count} excluded")
-        embed.set_footer(text=f"Last updated | {datetime.now().strftime('%I:%M %p')} | {valid_player_count} valid players")
+        valid_player_count = len(valid_entries)
 
-        return embed
+        # Process all players to get total levels and experience
+        processed_players = []
+        for entry in valid_entries:
+            # Use the level field directly from the API for total level
+            total_level = 0
+            total_exp = 0
+
+            # Get total level and exp from the API
+            if 'data' in entry:
+                if 'level' in entry['data']:
+                    total_level = entry['data']['level']
+                if 'experience' in entry['data']:
+                    total_exp = entry['data']['experience']
+
+            # Fallback if we couldn't find it in the expected location
+            if total_level == 0 and 'player' in entry and 'exp' in entry['player']:
+                total_exp = entry['player']['exp']
+
+            processed_players.append({
+                'name': entry['player']['displayName'],
+                'total_level': total_level,
+                'total_exp': total_exp
+            })
+
+        # Top 15 by total level first, then by total exp (partial selection, no full sort)
+        level_sorted = heapq.nsmallest(15, processed_players, key=lambda x: (-x['total_level'], -x['total_exp']))
+        # Top 15 purely by total exp
+        exp_sorted = heapq.nsmallest(15, processed_players, key=lambda x: -x['total_exp'])
+        no_players = "No players found meeting the criteria (≤ 2 in Attack/Strength/Magic/Ranged)"
+
+        print(f"Total level highscores ranked from {valid_player_count} valid players")
+        return leaderboard_view(
+            title=f"{group_name} Highscores - Total Level",
+            description=f"Top players in {group_name} by total level (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
+            fields=[
+                view_field("Top 15 Players by Total Level", [
+                    f"{i}. {player['name']} | Lvl: {player['total_level']} | XP: {player['total_exp']:,}"
+                    for i, player in enumerate(level_sorted, 1)
+                ], empty=no_players),
+                view_field("Top 15 Players by Total Experience", [
+                    f"{i}. {player['name']} | Lvl: {player['total_level']} | XP: {player['total_exp']:,}"
+                    for i, player in enumerate(exp_sorted, 1)
+                ], empty=no_players),
+            ],
+            footer_note=f"{valid_player_count} valid players"
+        )
 
     async def create_skills_embed(self, group_name, part=1):
         # All skills, excluding Attack, Strength, Magic, and Ranged
@@ -905,123 +2981,24 @@ class HighscoresBot(discord.Client):
         else:  # part 3
             skills = all_skills[skills_per_part*2:]  # Last third of skills
 
-        # Prepare skills embed
-        embed = discord.Embed(
-            title=f"{group_name} Highscores - Skills {part}",
-            description=f"Top 10 players in each skill for {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
-            color=0x3498db,
-            timestamp=datetime.now()
-        )
-
-        # Fetch all skill highscores concurrently to speed up processing
+        # Rank every skill concurrently; each field lists the top 10 qualifying players
         async def process_skill(skill):
-            skill_data = {
-                'name': skill.capitalize(),
-                'text': "",
-                'inline': len(embed.fields) % 3 != 0
-            }
-
-            skill_hiscores = await self.wom_client.get_group_hiscores(self.GROUP_ID, metric=skill)
-            if not skill_hiscores:
-                return skill_data
-
-            valid_count = 0
-            processed_count = 0
-            valid_entries = []
-
-            # First, concurrently validate the first batch of players
-            max_to_check = min(15, len(skill_hiscores))  # Check first 15 players max
-            batch = skill_hiscores[:max_to_check]
-
-            # Create validation tasks
-            validation_tasks = []
-            for entry in batch:
-                player_name = entry['player']['displayName']
-                validation_tasks.append((player_name, asyncio.create_task(self.is_valid_player(player_name))))
-
-            # Process the results
-            for player_name, validation_task in validation_tasks:
-                is_valid = await validation_task
-                if is_valid:
-                    # Find the entry for this player
-                    for entry in batch:
-                        if entry['player']['displayName'] == player_name:
-                            valid_entries.append(entry)
-                            if len(valid_entries) >= 10:
-                                break
-
-            # If we don't have 10 valid entries yet, process more players
-            processed_count = 0
-            valid_count = 0
-
-            # Process players in batches until we have 10 or have processed all available
-            batch_start = 0
-            while valid_count < 10 and batch_start < len(skill_hiscores):
-                batch_end = min(batch_start + 10, len(skill_hiscores))
-                current_batch = skill_hiscores[batch_start:batch_end]
-
-                # Validate this batch of players
-                validation_tasks = []
-                for entry in current_batch:
-                    player_name = entry['player']['displayName']
-                    validation_tasks.append((entry, asyncio.create_task(self.is_valid_player(player_name))))
-
-                for entry, validation_task in validation_tasks:
-                    is_valid = await validation_task
-                    if is_valid:
-                        # Extract player info
-                        player_name = entry['player']['displayName']
-                        skill_level = 0
-                        exp = 0
-
-                        # Get data from the entry
-                        if 'data' in entry:
-                            data = entry['data']
-                            if 'level' in data:
-                                skill_level = data.get('level', 0)
-                            if 'experience' in data:
-                                exp = data.get('experience', 0)
-
-                        # Only include players who have levels in this skill
-                        if exp > 0:
-                            valid_count += 1
-                            skill_data['text'] += f"{valid_count}. {player_name} | Lvl: {skill_level} | XP: {exp:,}\n"
-                            skill_data['has_data'] = True
-
-                            # Stop once we have 10 valid entries
-                            if valid_count >= 10:
-                                break
-
-                # Move to the next batch of players
-                batch_start = batch_end
-
-                # Small delay between batches to avoid rate limiting
-                await asyncio.sleep(0.1)
-
-            return skill_data
-
-        # Process all skills concurrently
-        skill_tasks = [process_skill(skill) for skill in skills]
-        skill_results = await asyncio.gather(*skill_tasks)
-
-        # Add all processed skills to the embed
-        for skill_data in skill_results:
-            if skill_data['text']:  # Only add field if there are players with levels
-                embed.add_field(
-                    name=skill_data['name'], 
-                    value=skill_data['text'], 
-                    inline=skill_data['inline']
-                )
-            else:
+            valid_entries = await self.get_ranked_players(skill, 10) or []
+            return view_field(
+                skill.capitalize(),
+                [
+                    f"{i}. {entry['player']['displayName']} | Lvl: {entry['data'].get('level', 0)} | XP: {entry['data']['experience']:,}"
+                    for i, entry in enumerate(valid_entries, 1)
+                ],
                 # Add a placeholder message if no results
-                embed.add_field(
-                    name=skill_data['name'],
-                    value="No players found with levels in this skill",
-                    inline=skill_data['inline']
-                )
+                empty="No players found with levels in this skill"
+            )
 
-        embed.set_footer(text=f"Last updated | {datetime.now().strftime('%I:%M %p')}")
-        return embed
+        return leaderboard_view(
+            title=f"{group_name} Highscores - Skills {part}",
+            description=f"Top 10 players in each skill for {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
+            fields=await asyncio.gather(*[process_skill(skill) for skill in skills])
+        )
 
     async def create_skills_embed1(self, group_name):
         return await self.create_skills_embed(group_name, part=1)
@@ -1065,93 +3042,31 @@ class HighscoresBot(discord.Client):
         else:  # part 5
             bosses = all_bosses[4*bosses_per_part:]
 
-        # Prepare bosses embed
-        embed = discord.Embed(
-            title=f"{group_name} Highscores - Bosses {part}",
-            description=f"Top 10 players for each boss in {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
-            color=0x3498db,
-            timestamp=datetime.now()
-        )
-
         # Process bosses concurrently for this part
         async def process_boss(boss):
+            boss_display_name = ' '.join(word.capitalize() for word in boss.split('_'))
             try:
-                boss_display_name = ' '.join(word.capitalize() for word in boss.split('_'))
-                boss_data = {
-                    'name': boss_display_name,
-                    'text': "",
-                    'has_data': False
-                }
-
-                boss_hiscores = await self.wom_client.get_group_hiscores(self.GROUP_ID, metric=boss)
-                if not boss_hiscores:
-                    return boss_data
-
-                # Only check the first 15 players maximum to find 10 valid ones
-                max_to_check = min(15, len(boss_hiscores))
-                batch = boss_hiscores[:max_to_check]
-
-                # Create validation tasks
-                validation_tasks = []
-                for entry in batch:
-                    player_name = entry['player']['displayName']
-                    validation_tasks.append((player_name, entry, asyncio.create_task(self.is_valid_player(player_name))))
-
-                # Process results in order of completion
-                valid_entries = []
-                for player_name, entry, validation_task in validation_tasks:
-                    is_valid = await validation_task
-                    if is_valid:
-                        # Get the kill count
-                        kills = 0
-                        if 'data' in entry and 'kills' in entry['data']:
-                            kills = entry['data']['kills']
-
-                        # Only include players who have kills for this boss
-                        if kills > 0:
-                            valid_entries.append((player_name, kills))
-                            if len(valid_entries) >= 10:
-                                break
-
-                # Build the text for this boss
-                for i, (player_name, kills) in enumerate(valid_entries[:10], 1):
-                    boss_data['text'] += f"{i}. {player_name} | KC: {kills:,}\n"
-                    boss_data['has_data'] = True
-
-                return boss_data
+                # Top 10 qualifying players with kills, from the shared ranking
+                valid_entries = await self.get_ranked_players(boss, 10) or []
             except Exception as e:
                 print(f"Error processing boss {boss}: {str(e)}")
-                return {
-                    'name': ' '.join(word.capitalize() for word in boss.split('_')),
-                    'text': "",
-                    'has_data': False
-                }
-
-        # Process all bosses concurrently with a semaphore to limit API calls
-        async def process_all_bosses():
-            tasks = []
-            for boss in bosses:
-                # Wait to acquire the semaphore before starting a new task
-                async with self.api_semaphore:
-                    tasks.append(process_boss(boss))
-            return await asyncio.gather(*tasks)
-
-        boss_results = await process_all_bosses()
-
-        # Add results to embed
-        for boss_data in boss_results:
-            if boss_data['has_data']:
-                embed.add_field(name=boss_data['name'], value=boss_data['text'], inline=True)
-            else:
+                valid_entries = []
+            return view_field(
+                boss_display_name,
+                [
+                    f"{i}. {entry['player']['displayName']} | KC: {entry['data']['kills']:,}"
+                    for i, entry in enumerate(valid_entries, 1)
+                ],
+                inline=True,
                 # Add a placeholder message
-                embed.add_field(
-                    name=boss_data['name'],
-                    value="No qualifying players found with kills",
-                    inline=True
-                )
+                empty="No qualifying players found with kills"
+            )
 
-        embed.set_footer(text=f"Last updated | {datetime.now().strftime('%I:%M %p')}")
-        return embed
+        return leaderboard_view(
+            title=f"{group_name} Highscores - Bosses {part}",
+            description=f"Top 10 players for each boss in {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
+            fields=await asyncio.gather(*[process_boss(boss) for boss in bosses])
+        )
 
     async def create_bosses_embed1(self, group_name):
         return await self.create_bosses_embed(group_name, part=1)
@@ -1173,7 +3088,7 @@ class HighscoresBot(discord.Client):
         try:
             # Get group name
             group_name = "OSRS Defence"  # Default name
-            group_info = await self.wom_client.get_group_details(self.GROUP_ID)
+            group_info = await self.wom_client.get_group_details(self.group_id)
             if group_info and 'name' in group_info:
                 group_name = group_info['name']
 
@@ -1190,127 +3105,60 @@ class HighscoresBot(discord.Client):
             # Format the category name for display
             display_name = ' '.join(word.capitalize() for word in category.split('_'))
 
-            # Create the embed
-            embed = discord.Embed(
-                title=f"{group_name} Highscores - {display_name}",
-                description=f"Top 15 players in {display_name} for {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
-                color=0x3498db,
-                timestamp=datetime.now()
-            )
+            title = f"{group_name} Highscores - {display_name}"
+            description = f"Top 15 players in {display_name} for {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)"
+
+            # Top 15 qualifying players, from the ranking shared with the multi-category views
+            valid_entries = await self.get_ranked_players(category, 15)
+            if valid_entries is None:
+                return leaderboard_view(title, description, [
+                    view_field("Error", ["Could not fetch highscores for this category"])
+                ])
 
-            # Get the highscores for this category
-            highscores = await self.wom_client.get_group_hiscores(self.GROUP_ID, metric=category)
-            if not highscores:
-                embed.add_field(name="Error", value="Could not fetch highscores for this category", inline=False)
-                return embed
-
-            # Process players in batches
-            valid_players = []
-            batch_size = 10
-            batches = [highscores[i:i+batch_size] for i in range(0, min(60, len(highscores)), batch_size)]
-
-            for batch in batches:
-                # Create validation tasks
-                validation_tasks = []
-                for entry in batch:
-                    player_name = entry['player']['displayName']
-                    validation_tasks.append((entry, asyncio.create_task(self.is_valid_player(player_name))))
-
-                # Process results
-                for entry, validation_task in validation_tasks:
-                    is_valid = await validation_task
-                    if is_valid:
-                        player_name = entry['player']['displayName']
-
-                        # Get appropriate data based on whether it's a skill or boss
-                        if is_skill:
-                            if 'data' in entry and 'level' in entry['data'] and 'experience' in entry['data']:
-                                level = entry['data']['level']
-                                exp = entry['data']['experience']
-                                # Only include if they have XP in this skill
-                                if exp > 0:
-                                    valid_players.append({
-                                        'name': player_name,
-                                        'level': level,
-                                        'exp': exp
-                                    })
-                        else:  # It's a boss
-                            if 'data' in entry and 'kills' in entry['data']:
-                                kills = entry['data']['kills']
-                                # Only include if they have kills for this boss
-                                if kills > 0:
-                                    valid_players.append({
-                                        'name': player_name,
-                                        'kills': kills
-                                    })
-
-                        # If we have enough players, stop processing
-                        if len(valid_players) >= 15:  # We only display 15 anyway
-                            break
-
-                        # Small delay between batches
-                        await asyncio.sleep(0.1)
+            if is_skill:
+                valid_players = [
+                    {'name': entry['player']['displayName'], 'level': entry['data'].get('level', 0), 'exp': entry['data']['experience']}
+                    for entry in valid_entries
+                ]
+            else:
+                valid_players = [
+                    {'name': entry['player']['displayName'], 'kills': entry['data']['kills']}
+                    for entry in valid_entries
+                ]
 
             # Sort the players appropriately
             if is_skill:
                 # Sort by level first, then by exp
                 valid_players.sort(key=lambda x: (-x['level'], -x['exp']))
-
-                # Add players to the embed
-                player_list_text = ""
-                for i, player in enumerate(valid_players[:15], 1):
-                    player_list_text += f"{i}. {player['name']} | Lvl: {player['level']} | XP: {player['exp']:,}\n"
-
-                if player_list_text:
-                    embed.add_field(name=f"Top Players in {display_name}", value=player_list_text, inline=False)
-                else:
-                    embed.add_field(name=f"Top Players in {display_name}", value="No players found with levels in this skill", inline=False)
+                field = view_field(
+                    f"Top Players in {display_name}",
+                    [f"{i}. {player['name']} | Lvl: {player['level']} | XP: {player['exp']:,}" for i, player in enumerate(valid_players[:15], 1)],
+                    empty="No players found with levels in this skill"
+                )
             else:
                 # Sort by kill count
                 valid_players.sort(key=lambda x: -x['kills'])
+                field = view_field(
+                    f"Top Players at {display_name}",
+                    [f"{i}. {player['name']} | KC: {player['kills']:,}" for i, player in enumerate(valid_players[:15], 1)],
+                    empty="No players found with kills for this boss"
+                )
 
-                # Add players to the embed
-                player_list_text = ""
-                for i, player in enumerate(valid_players[:15], 1):
-                    player_list_text += f"{i}. {player['name']} | KC: {player['kills']:,}\n"
-
-                if player_list_text:
-                    embed.add_field(name=f"Top Players at {display_name}", value=player_list_text, inline=False)
-                else:
-                    embed.add_field(name=f"Top Players at {display_name}", value="No players found with kills for this boss", inline=False)
-
-            # Add footer
-            player_count = len(valid_players)
-            embed.set_footer(text=f"Last updated | {datetime.now().strftime('%I:%M %p')} | {player_count} valid players")
-
-            return embed
+            return leaderboard_view(title, description, [field], footer_note=f"{len(valid_players)} valid players")
         except Exception as e:
             print(f"Error creating embed for {category}: {str(e)}")
-            # Create an error embed
-            error_embed = discord.Embed(
-                title="Error",
-                description=f"An error occurred while creating highscores for {category}: {str(e)}",
-                color=0xFF0000
-            )
-            return error_embed
+            # Create an error view
+            return error_view(f"An error occurred while creating highscores for {category}: {str(e)}")
 
     async def create_bosses_overview_embed(self):
         """Create an overview embed showing top 10 highest KC players across all bosses"""
         try:
             # Get group name
             group_name = "OSRS Defence"  # Default name
-            group_info = await self.wom_client.get_group_details(self.GROUP_ID)
+            group_info = await self.wom_client.get_group_details(self.group_id)
             if group_info and 'name' in group_info:
                 group_name = group_info['name']
 
-            # Create the overview embed
-            embed = discord.Embed(
-                title=f"{group_name} Highscores - Top Boss KCs",
-                description=f"Top 10 highest boss KCs in {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
-                color=0x3498db,
-                timestamp=datetime.now()
-            )
-
             # The 24 specific bosses to check as requested
             all_bosses = [
                 'bryophyta', 'callisto', 'chambers_of_xeric', 
@@ -1322,142 +3170,214 @@ class HighscoresBot(discord.Client):
                 'vetion', 'wintertodt'
             ]
 
-            # Store all player KCs across all bosses
-            all_kcs = []
-
-            # Process a batch of bosses at a time to avoid rate limiting
-            batch_size = 5
-            boss_batches = [all_bosses[i:i+batch_size] for i in range(0, len(all_bosses), batch_size)]
+            # Top 5 qualifying players with kills for each boss, from the shared rankings
+            async def process_boss(boss):
+                try:
+                    # Format boss name for display
+                    display_name = ' '.join(word.capitalize() for word in boss.split('_'))
+                    return [
+                        {'name': entry['player']['displayName'], 'boss': display_name, 'kills': entry['data']['kills']}
+                        for entry in await self.get_ranked_players(boss, 5) or []
+                    ]
+                except Exception as e:
+                    print(f"Error processing boss {boss}: {str(e)}")
+                    return []
 
-            for boss_batch in boss_batches:
-                boss_tasks = []
-                for boss_name in boss_batch:
-                    # Create a task for each boss in the batch
-                    async def process_boss(boss):
-                        try:
-                            # Format boss name for display
-                            display_name = ' '.join(word.capitalize() for word in boss.split('_'))
-
-                            # Get the highscores for this boss
-                            boss_hiscores = await self.wom_client.get_group_hiscores(self.GROUP_ID, metric=boss)
-                            if not boss_hiscores:
-                                return []
-
-                            # Find valid players with kills
-                            boss_kcs = []
-                            max_to_check = min(5, len(boss_hiscores))  # Check top 5 for each boss
-
-                            # Create validation tasks
-                            validation_tasks = []
-                            for entry in boss_hiscores[:max_to_check]:
-                                player_name = entry['player']['displayName']
-                                validation_tasks.append((entry, asyncio.create_task(self.is_valid_player(player_name))))
-
-                            # Process results
-                            for entry, validation_task in validation_tasks:
-                                    is_valid = await validation_task
-                                    if is_valid:
-                                        player_name = entry['player']['displayName']
-
-                                        if 'data' in entry and 'kills' in entry['data']:
-                                            kills = entry['data']['kills']
-
-                                            # Only include if they have kills for this boss
-                                            if kills > 0:
-                                                boss_kcs.append({
-                                                    'name': player_name,
-                                                    'boss': display_name,
-                                                    'kills': kills
-                                                })
-
-                            return boss_kcs
-                        except Exception as e:
-                            print(f"Error processing boss {boss}: {str(e)}")
-                            return []
+            # Store all player KCs across all bosses
+            all_kcs = [kc for boss_kcs in await asyncio.gather(*[process_boss(boss) for boss in all_bosses]) for kc in boss_kcs]
 
-                    boss_tasks.append(process_boss(boss_name))
+            # Find the top 10 KCs across all bosses
+            top_10_kcs = heapq.nsmallest(10, all_kcs, key=lambda x: -x['kills'])
 
-                # Run all boss tasks in this batch concurrently
-                batch_results = await asyncio.gather(*boss_tasks)
+            return leaderboard_view(
+                title=f"{group_name} Highscores - Top Boss KCs",
+                description=f"Top 10 highest boss KCs in {group_name} (≤ 2 in Attack/Strength/Magic/Ranged, any level Defence/Hitpoints/Prayer)",
+                fields=[view_field(
+                    "Top 10 Highest Boss KCs",
+                    [f"{i}. {entry['name']} - {entry['kills']:,} {entry['boss']} KC" for i, entry in enumerate(top_10_kcs, 1)],
+                    empty="No valid players found with boss kills"
+                )]
+            )
+        except Exception as e:
+            print(f"Error creating boss overview embed: {str(e)}")
+            # Create an error view
+            return error_view(f"An error occurred while creating the boss overview: {str(e)}")
+
+    # Embeds older than this are still served, but rebuilt in the background (30 minutes)
+    EMBED_SOFT_TTL = 30 * 60
+    # Embeds older than this are dropped and the user waits for a rebuild (24 hours)
+    EMBED_HARD_TTL = 24 * 60 * 60
+
+    def peek_embed(self, view_type):
+        """Return the cached embed for a view type without waiting, or None if a build is needed"""
+        rendered = self.cached_embeds.get(view_type)
+        if rendered is not None:
+            return rendered.embed
+
+        # Past the soft TTL: serve what we have and refresh it behind the scenes
+        rendered = self.cached_embeds.get(view_type, allow_stale=True)
+        if rendered is not None:
+            print(f"Serving stale embed for {view_type}, rebuilding in the background")
+            self.schedule_embed_rebuild(view_type)
+            return rendered.embed
+        return None
 
-                # Combine all results
-                for result in batch_results:
-                    all_kcs.extend(result)
+    async def get_embed(self, view_type):
+        """Return the embed for a view type with stale-while-revalidate semantics.
 
-                # Small delay between batches to avoid API rate limits
-                await asyncio.sleep(0.5)
+        The embed is shared with every other caller and must not be modified.
+        """
+        embed = self.peek_embed(view_type)
+        if embed is not None:
+            return embed
 
-            # Find the top 10 KCs across all bosses
-            all_kcs.sort(key=lambda x: -x['kills'])
-            top_10_kcs = all_kcs[:10]
-
-            if top_10_kcs:
-                top_kcs_text = ""
-                for i, entry in enumerate(top_10_kcs, 1):
-                    top_kcs_text += f"{i}. {entry['name']} - {entry['kills']:,} {entry['boss']} KC\n"
-
-                embed.add_field(
-                    name="Top 10 Highest Boss KCs",
-                    value=top_kcs_text,
-                    inline=False
-                )
+        # Nothing usable cached: the caller has to wait for a build
+        return await self.rebuild_embed(view_type)
+
+    async def current_render(self, view_type):
+        """The rendered embed for a view type, rebuilt first if it's past the soft TTL (None if that fails)"""
+        rendered = self.cached_embeds.get(view_type)
+        if rendered is None:
+            # Data older than one auto-refresh interval is refetched, so a scheduled pass publishes new data
+            # even without prewarming
+            await self.rebuild_embed(view_type, max_age=AUTO_REFRESH_INTERVAL, priority=wom_priority.get())
+            rendered = self.cached_embeds.get(view_type)
+        return rendered
+
+    def _embed_build_task(self, view_type, max_age, priority):
+        # One build per view type at a time; later callers join the running one
+        build_task = self.embed_builds.get(view_type)
+        if build_task is None or build_task.done():
+            build_task = asyncio.create_task(self._build_and_cache_embed(view_type, max_age, priority))
+            self.embed_builds[view_type] = build_task
+        else:
+            # A user joining a background build pulls its requests up to their class
+            self.wom_client.scheduler.boost(self.owner(view_type), priority)
+        return build_task
+
+    def schedule_embed_rebuild(self, view_type, max_age=EMBED_SOFT_TTL, priority=PRIORITY_PREFETCH):
+        """Start a background rebuild of a view type unless one is already running"""
+        build_task = self._embed_build_task(view_type, max_age, priority)
+        if build_task not in self.detached_builds:
+            self.detached_builds.add(build_task)
+            build_task.add_done_callback(self.detached_builds.discard)
+        return build_task
+
+    async def rebuild_embed(self, view_type, max_age=None, priority=PRIORITY_INTERACTIVE):
+        """Rebuild a view type now and wait for it (max_age=None accepts any unexpired API data)"""
+        build_task = self._embed_build_task(view_type, max_age, priority)
+        self.embed_build_waiters[view_type] = self.embed_build_waiters.get(view_type, 0) + 1
+        try:
+            return await asyncio.shield(build_task)
+        finally:
+            self.embed_build_waiters[view_type] -= 1
+            if not self.embed_build_waiters[view_type]:
+                del self.embed_build_waiters[view_type]
+                if not build_task.done():
+                    self._abandon_embed_build(view_type, build_task)
+
+    def _abandon_embed_build(self, view_type, build_task):
+        # Every caller left (e.g. a newer selection superseded the click that started it)
+        self.wom_client.scheduler.unboost(self.owner(view_type))
+        if build_task not in self.detached_builds:
+            print(f"Cancelling {view_type} build nobody is waiting for")
+            build_task.cancel()
+            if self.embed_builds.get(view_type) is build_task:
+                del self.embed_builds[view_type]
+
+    async def _build_and_cache_embed(self, view_type, max_age, priority):
+        # Builds started outside a traced operation (prewarm, background rebuilds) are traced on their own
+        if current_trace.get() is None:
+            with traced(f"build {view_type} (group {self.group_id})"):
+                return await self._build_and_cache_embed(view_type, max_age, priority)
+        # WOM responses older than max_age are refetched for this build only
+        wom_max_age.set(max_age)
+        # The build's requests are queued at its priority and share that class fairly with other views
+        wom_priority.set(priority)
+        wom_request_owner.set(self.owner(view_type))
+        started = time.time()
+        build_started = time.perf_counter()
+        outcome = "cancelled"
+        try:
+            view = await self.build_view(view_type)
+            outcome = "error" if isinstance(view, str) else "ok"
+        except Exception as e:
+            outcome = "error"
+            print(f"Error rebuilding {view_type} embed: {str(e)}")
+            return f"An error occurred while updating highscores: {str(e)}"
+        finally:
+            self.wom_client.scheduler.unboost(self.owner(view_type))
+            EMBED_BUILD_SECONDS.observe(time.perf_counter() - build_started, self.group_id, view_type, outcome)
+
+        if isinstance(view, str):
+            return view
+        rendered = self.render_embed(view_type, view)
+        self.cached_embeds.set(view_type, rendered)
+        self.cache_times[view_type] = started
+        return rendered.embed
+
+    def render_embed(self, view_type, view):
+        """Render view data, reusing the payload already rendered for the same generation"""
+        with trace_span("render"):
+            generation = view_generation(view)
+            rendered = self.rendered_embeds.get((view_type, generation))
+            if rendered is not None:
+                # Same data as before: only the timestamp and footer change
+                rendered = rendered.restamp()
             else:
-                embed.add_field(
-                    name="Top 10 Highest Boss KCs",
-                    value="No valid players found with boss kills",
-                    inline=False
-                )
+                rendered = render_view(view_type, view, generation)
+        self.rendered_embeds.set((view_type, generation), rendered)
+        return rendered
 
-            # Add footer
-            embed.set_footer(text=f"Last updated | {datetime.now().strftime('%I:%M %p')}")
+    def refresh_cached_embeds(self, exclude=("total",)):
+        """Rebuild every other cached view in the background with fresh API data"""
+        for view_type in self.cached_embeds.keys():
+            if view_type not in exclude:
+                self.schedule_embed_rebuild(view_type, max_age=0, priority=PRIORITY_BULK)
 
-            return embed
-        except Exception as e:
-            print(f"Error creating boss overview embed: {str(e)}")
-            # Create an error embed
-            error_embed = discord.Embed(
-                title="Error",
-                description=f"An error occurred while creating the boss overview: {str(e)}",
-                color=0xFF0000
-            )
-            return error_embed
+    async def update_highscores(self, message=None, view_type="total", force_refresh=False):
+        if force_refresh:
+            # Forced refreshes wait for fresh API data instead of serving a cached embed
+            return await self.rebuild_embed(view_type, max_age=0)
+        return await self.get_embed(view_type)
 
     # Dagannoth Kings function removed
-    async def update_highscores(self, message=None, view_type="total", force_refresh=False):
+    async def build_view(self, view_type="total"):
+        """Leaderboard data for a view type (see leaderboard_view), or an error message"""
         try:
             # Get group details
-            group_details = await self.wom_client.get_group_hiscores(self.GROUP_ID)
+            group_details = await self.wom_client.get_group_hiscores(self.group_id)
             if not group_details:
                 return "Could not fetch group details"
 
             group_name = "OSRS Defence"  # Default name in case we can't get it from API
 
             # Try to get the proper group name if possible
-            group_info = await self.wom_client.get_group_details(self.GROUP_ID)
+            group_info = await self.wom_client.get_group_details(self.group_id)
             if group_info and 'name' in group_info:
                 group_name = group_info['name']
 
-            # Create appropriate embed based on view type
+            # Create appropriate view based on view type
             if view_type == "total":
-                embed = await self.create_total_level_embed(group_name)
+                view = await self.create_total_level_embed(group_name)
             elif view_type == "skills1":
-                embed = await self.create_skills_embed1(group_name)
+                view = await self.create_skills_embed1(group_name)
             elif view_type == "skills2":
-                embed = await self.create_skills_embed2(group_name)
+                view = await self.create_skills_embed2(group_name)
             elif view_type == "skills3":
-                embed = await self.create_skills_embed3(group_name)
+                view = await self.create_skills_embed3(group_name)
             elif view_type == "bosses1":
-                embed = await self.create_bosses_embed1(group_name)
+                view = await self.create_bosses_embed1(group_name)
             elif view_type == "bosses2":
-                embed = await self.create_bosses_embed2(group_name)
+                view = await self.create_bosses_embed2(group_name)
             elif view_type == "bosses3":
-                embed = await self.create_bosses_embed3(group_name)
+                view = await self.create_bosses_embed3(group_name)
             elif view_type == "bosses4":
-                embed = await self.create_bosses_embed4(group_name)
+                view = await self.create_bosses_embed4(group_name)
             elif view_type == "bosses5":
-                embed = await self.create_bosses_embed5(group_name)
+                view = await self.create_bosses_embed5(group_name)
             elif view_type == "bosses_overview":
-                embed = await self.create_bosses_overview_embed()
+                view = await self.create_bosses_overview_embed()
             # Check if it's a specific skill or boss
             elif view_type in ['defence', 'hitpoints', 'prayer', 'cooking', 'woodcutting', 
                               'fletching', 'fishing', 'firemaking', 'crafting', 'smithing', 
@@ -1470,168 +3390,17 @@ class HighscoresBot(discord.Client):
                               'kril_tsutsaroth', 'obor', 'sarachnis', 'scorpia', 'scurrius', 
                               'tempoross', 'the_hueycoatl', 'the_royal_titans', 'venenatis', 
                               'vetion', 'wintertodt']:
-                embed = await self.create_single_category_embed(view_type)
+                view = await self.create_single_category_embed(view_type)
             else:
-                embed = await self.create_total_level_embed(group_name)  # Default to total level
+                view = await self.create_total_level_embed(group_name)  # Default to total level
 
-            if embed is None:
+            if view is None:
                 return "Could not create highscores embed"
 
-            if not force_refresh:
-                self.cached_embeds[view_type] = embed
-
-            return embed
+            return view
         except Exception as e:
             return f"An error occurred while updating highscores: {str(e)}"
 
-    async def on_message(self, message):
-        if message.author == self.user:
-            return
-
-        if message.content.lower() == '/clanhighscores':
-            # For /clanhighscores, we just display the highscores with latest data
-            processing_msg = await message.channel.send("Fetching highscores... Please wait a moment.")
-            print(f"DEBUG: Received command: {message.content}")
-
-            embed_or_error = await self.update_highscores(message)
-
-            if isinstance(embed_or_error, str):
-                print(f"DEBUG: Error returned: {embed_or_error}")
-                await message.channel.send(f"⚠️ {embed_or_error}")
-            else:
-                print("DEBUG: Successfully created embed, sending to channel")
-                # Create view with buttons and pass cached embeds - default to skills view
-                view = HighscoresView(self, self.cached_embeds, active_category="skills")
-
-                # Send a new message with the highscores and buttons
-                new_message = await message.channel.send(embed=embed_or_error, view=view)
-                self.last_message = new_message
-
-                # Delete the processing message after sending the embed
-                try:
-                    await processing_msg.delete()
-                except:
-                    pass
-
-                print("DEBUG: Message sent successfully")
-
-        elif message.content.lower() == '!refresh':
-            # For !refresh, we update the last sent message if itexists:
-            if self.last_message is None:
-                await message.channel.send("No highscores message to refresh. Please use `/clanhighscores` first.")
-                return
-
-            processing_msg = await message.channel.send("Refreshing highscores... Please wait a moment.")
-            print(f"DEBUG: Received refresh command")
-
-            # Force refresh the cache
-            embed_or_error = await self.update_highscores(message, force_refresh=True)
-
-            if isinstance(embed_or_error, str):
-                print(f"DEBUG: Error returned: {embed_or_error}")
-                await message.channel.send(f"⚠️ {embed_or_error}")
-            else:
-                print("DEBUG: Successfully created embed, updating last message")
-                try:
-                    # Create view with buttons - preserve the active category if we can detect it from current view
-                    active_category = "skills"  # Default
-
-                    # Try to determine the current active category from the message
-                    if hasattr(self.last_message, "components") and self.last_message.components:
-                        for row in self.last_message.components:
-                            for component in row.children:
-                                if isinstance(component, discord.ui.Button):
-                                    if component.custom_id == "skills_button" and component.style == discord.ButtonStyle.primary:
-                                        active_category = "skills"
-                                        break
-                                    elif component.custom_id == "bosses_button" and component.style == discord.ButtonStyle.primary:
-                                        active_category = "bosses"
-                                        break
-
-                    view = HighscoresView(self, self.cached_embeds, active_category=active_category)
-
-                    # Edit the last message instead of sending a new one
-                    await self.last_message.edit(embed=embed_or_error, view=view)
-                    await message.add_reaction("✅")  # Add a checkmark reaction to indicate success
-                except Exception as e:
-                    print(f"DEBUG: Error updating message: {str(e)}")
-                    await message.channel.send("Error updating the message. Sending a new one instead.")
-
-                    # Create view with buttons
-                    view = HighscoresView(self, self.cached_embeds, active_category="skills")
-                    new_message = await message.channel.send(embed=embed_or_error, view=view)
-                    self.last_message = new_message
-
-                # Delete the processing message after updating
-                try:
-                    await processing_msg.delete()
-                except:
-                    pass
-
-                print("DEBUG: Message refreshed successfully")
-
-        elif message.content.lower() == '/cacherefresh' or message.content.lower() == '/refreshcache':
-            # Refresh cache and create new embed
-            processing_msg = await message.channel.send("Refreshing highscores cache and creating a new embed...")
-            print(f"DEBUG: Received cacherefresh command")
-
-            # Force refresh the cache
-            embed_or_error = await self.update_highscores(message, force_refresh=True)
-
-            if isinstance(embed_or_error, str):
-                print(f"DEBUG: Error returned: {embed_or_error}")
-                await message.channel.send(f"⚠️ {embed_or_error}")
-            else:
-                # Set timestamp
-                if isinstance(embed_or_error, discord.Embed):
-                    embed_or_error.timestamp = datetime.now()
-
-                # Create view with buttons
-                view = HighscoresView(self, self.cached_embeds, active_category="skills")
-
-                # Send a new message with refreshed data
-                new_message = await message.channel.send(embed=embed_or_error, view=view)
-                self.last_message = new_message
-
-                # Delete the processing message
-                try:
-                    await processing_msg.delete()
-                except:
-                    pass
-
-                print("DEBUG: Cache refreshed and new embed created successfully")
-
-        elif message.content.lower() == '/new':
-            # Create a new embed without refreshing cache
-            processing_msg = await message.channel.send("Creating a new highscores embed without refreshing cache...")
-            print(f"DEBUG: Received new embed command")
-
-            # Get embed from cache or create a new one without refreshing
-            if "total" in self.cached_embeds:
-                embed = self.cached_embeds["total"]
-                embed.timestamp = datetime.now()
-            else:
-                embed = await self.update_highscores(message, force_refresh=False)
-
-            if isinstance(embed, str):
-                print(f"DEBUG: Error returned: {embed}")
-                await message.channel.send(f"⚠️ {embed}")
-            else:
-                # Create view with buttons
-                view = HighscoresView(self, self.cached_embeds, active_category="skills")
-
-                # Send a new message
-                new_message = await message.channel.send(embed=embed, view=view)
-                self.last_message = new_message
-
-                # Delete the processing message
-                try:
-                    await processing_msg.delete()
-                except:
-                    pass
-
-                print("DEBUG: New embed created successfully without refreshing cache")
-
 intents = discord.Intents.default()
 intents.message_content = True
 
@@ -1652,12 +3421,12 @@ async def on_ready():
             print("Clearing existing commands...")
             client.tree.clear_commands(guild=None)
 
-            # Only register the 'new' and 'refreshcache' commands
-            print("Registering only /new and /refreshcache commands...")
+            # Only register the 'new', 'refreshcache' and 'profile' commands
+            print("Registering only /new, /refreshcache and /profile commands...")
 
             # Remove any existing commands with the same names
             for cmd in client.tree.get_commands():
-                if cmd.name in ["new", "cacherefresh"]:
+                if cmd.name in ["new", "cacherefresh", "profile"]:
                     client.tree.remove_command(cmd.name)
 
             # Add commands explicitly before syncing
@@ -1667,6 +3436,7 @@ async def on_ready():
                 try:
                     # Respond immediately to prevent timeout
                     await interaction.response.defer(thinking=True, ephemeral=True)
+                    client.record_ack(interaction, "command")
 
                     # Get the channel where the command was used
                     channel = interaction.channel
@@ -1682,7 +3452,7 @@ async def on_ready():
                         loading_message = await channel.send("Creating new highscores embed... please wait...")
 
                         # Show loading state in the UI
-                        loading_view = HighscoresView(client, client.cached_embeds, active_category="skills", is_loading=True)
+                        loading_view = client.highscores_view("skills", is_loading=True)
                         try:
                             temp_embed = discord.Embed(
                                 title="Loading data...",
@@ -1694,29 +3464,27 @@ async def on_ready():
                             print(f"Error setting initial loading state: {str(e)}")
 
                         # Get embed from cache or create a new one
-                        if "total" in client.cached_embeds:
-                            embed = client.cached_embeds["total"]
-                            embed.timestamp = datetime.now()
+                        pipeline = client.pipeline_for(interaction.guild_id)
+                        if "total" in pipeline.cached_embeds:
                             print("Using cached total embed for /new command")
                         else:
                             print("No cached total embed found, creating new one for /new command")
-                            embed = await client.update_highscores(force_refresh=False)
-
+                        embed = await pipeline.update_highscores(force_refresh=False)
                         if isinstance(embed, discord.Embed):
                             # Create a new view with cached embeds (not in loading state)
-                            view = HighscoresView(client, client.cached_embeds, active_category="skills", is_loading=False)
+                            view = client.highscores_view("skills")
 
                             # Edit the loading message
                             try:
                                 await loading_message.edit(content=None, embed=embed, view=view)
-                                client.last_message = loading_message
+                                await client.track_message(interaction.guild_id, loading_message)
                                 # Update the followup message
                                 await interaction.edit_original_response(content="✅ Successfully created new highscores embed")
                             except discord.errors.HTTPException as http_err:
                                 print(f"HTTP error when editing message: {str(http_err)}")
                                 # If edit fails, send a new message
                                 new_message = await channel.send(embed=embed, view=view)
-                                client.last_message = new_message
+                                await client.track_message(interaction.guild_id, new_message)
                                 try:
                                     await loading_message.delete()
                                 except:
@@ -1754,6 +3522,7 @@ async def on_ready():
                 try:
                     # Respond immediately to prevent timeout
                     await interaction.response.defer(thinking=True, ephemeral=True)
+                    client.record_ack(interaction, "command")
 
                     channel = interaction.channel
                     if not channel:
@@ -1771,7 +3540,7 @@ async def on_ready():
                                 loading_message = await channel.send("Refreshing highscores data... please wait...")
 
                                 # Show loading state immediately
-                                loading_view = HighscoresView(client, client.cached_embeds, active_category="skills", is_loading=True)
+                                loading_view = client.highscores_view("skills", is_loading=True)
                                 try:
                                     temp_embed = discord.Embed(
                                         title="Refreshing cache...",
@@ -1782,20 +3551,19 @@ async def on_ready():
                                 except Exception as e:
                                     print(f"Error setting initial loading state: {str(e)}")
 
-                                # Force refresh the cache
-                                embed = await client.update_highscores(force_refresh=True)
+                                # Force refresh the cache, then refresh the other cached views in the background
+                                pipeline = client.pipeline_for(interaction.guild_id)
+                                embed = await pipeline.update_highscores(force_refresh=True)
+                                pipeline.refresh_cached_embeds()
 
-                                # Set timestamp
                                 if isinstance(embed, discord.Embed):
-                                    embed.timestamp = datetime.now()
-
                                     # Create view with buttons (not in loading state)
-                                    view = HighscoresView(client, client.cached_embeds, active_category="skills", is_loading=False)
+                                    view = client.highscores_view("skills")
 
                                     # Edit loading message with the new embed or send new message if edit fails
                                     try:
                                         await loading_message.edit(content=None, embed=embed, view=view)
-                                        client.last_message = loading_message
+                                        await client.track_message(interaction.guild_id, loading_message)
                                         try:
                                             # Update the original interaction response
                                             await interaction.edit_original_response(content="✅ Cache refreshed and new embed created successfully!")
@@ -1805,7 +3573,7 @@ async def on_ready():
                                         print(f"Error editing message: {str(edit_error)}")
                                         try:
                                             new_message = await channel.send(embed=embed, view=view)
-                                            client.last_message = new_message
+                                            await client.track_message(interaction.guild_id, new_message)
                                             await loading_message.delete()
                                             # Update the original interaction response
                                             await interaction.edit_original_response(content="✅ Cache refreshed and new embed created in a new message!")
@@ -1844,6 +3612,26 @@ async def on_ready():
                     except:
                         print("Could not respond to interaction after error")
 
+            @client.tree.command(name="profile", description="Show the slowest recent highscores builds, stage by stage")
+            @app_commands.default_permissions(manage_guild=True)
+            async def profile_command(interaction: discord.Interaction):
+                traces = slowest_traces(5)
+                if not traces:
+                    await interaction.response.send_message("No builds have been traced yet.", ephemeral=True)
+                    return
+                lines = [f"Slowest of the last {len(TRACES)} traced operations:"]
+                for position, trace in enumerate(traces, 1):
+                    # Each moment counts towards the most specific stage running then, so stages add up to the total
+                    stages = ", ".join(
+                        f"{stage} {seconds:.1f}s" for stage, seconds in trace.breakdown().items() if seconds >= 0.05
+                    )
+                    minutes_ago = int((time.time() - trace.finished_at) / 60)
+                    lines.append(
+                        f"**{position}. {trace.name}**: {trace.duration:.1f}s, {trace.outcome}, {minutes_ago} min ago\n"
+                        f"    {stages or 'no stage took 0.05s'}"
+                    )
+                await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
             # Sync the commands globally (may take up to an hour to propagate)
             print("Syncing command tree...")
             await client.tree.sync()